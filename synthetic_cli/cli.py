@@ -1,9 +1,15 @@
 """
 The main entrypoint for the CLI application, powered by Typer.
+
+Heavy dependencies (Textual, transformers) are imported inside the
+commands that need them so that `--help` and the TUI start quickly.
 """
 
+import os
+from pathlib import Path
+from typing import List, Optional
+
 import typer
-from synthetic_cli.tui.app import ConfiguratorApp
 
 app = typer.Typer(no_args_is_help=False)
 
@@ -11,8 +17,253 @@ app = typer.Typer(no_args_is_help=False)
 def main(ctx: typer.Context):
     """The main entry point for the CLI application."""
     if ctx.invoked_subcommand is None:
+        from synthetic_cli.tui.app import ConfiguratorApp
+
         app = ConfiguratorApp()
         app.run()
 
+@app.command()
+def generate(
+    config: Path = typer.Option(
+        ..., "--config", "-c", exists=True, dir_okay=False, readable=True,
+        help="Path to a JSON or YAML generation config.",
+    ),
+    workers: int = typer.Option(
+        1, "--workers", "-w", min=1,
+        help="Number of processes to shard the run across, each with its own model copy.",
+    ),
+    resume: Optional[Path] = typer.Option(
+        None, "--resume", dir_okay=False,
+        help="Continue an interrupted run, appending to this output file.",
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None, "--cache-dir", file_okay=False,
+        help="Directory of the completion cache (overrides the config file).",
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Always run the model instead of reusing cached completions.",
+    ),
+    progress_json: Optional[str] = typer.Option(
+        None, "--progress-json",
+        help="Stream progress events as JSON lines to this file ('-' for stderr).",
+    ),
+    profile: bool = typer.Option(
+        False, "--profile", help="Time each generation stage and write a report next to the output.",
+    ),
+    profiler_tool: Optional[str] = typer.Option(
+        None, "--profiler",
+        help="Also record a full trace with 'cprofile' or 'torch' (implies --profile).",
+    ),
+    no_server: bool = typer.Option(
+        False, "--no-server", help="Load the model in this process even if a 'serve' daemon is running.",
+    ),
+    queue: Optional[Path] = typer.Option(
+        None, "--queue", file_okay=False,
+        help="Write the run as work units to this shared directory for 'worker' processes instead of generating.",
+    ),
+    unit_batches: int = typer.Option(10, "--unit-batches", min=1, help="Output batches per work unit (with --queue)."),
+    lease_seconds: float = typer.Option(
+        300.0, "--lease", min=1.0, help="Seconds without a heartbeat before a claimed work unit is reassigned (with --queue).",
+    ),
+    offline: bool = typer.Option(
+        False, "--offline", help="Load models only from snapshots downloaded by 'prefetch', without network access or a token.",
+    ),
+):
+    """Runs data generation non-interactively from a config file."""
+    if offline:
+        # Read by huggingface_hub and transformers when they are first imported.
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+    from synthetic_cli.config.loader import load_config
+    from synthetic_cli.commands.generate import generate_data
+
+    try:
+        generation_config = load_config(config)
+    except ValueError as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    if offline:
+        generation_config.model_config.offline = True
+
+    if queue is not None:
+        from synthetic_cli.commands.workqueue import create_queue
+
+        if workers > 1 or resume:
+            typer.secho("Error: --queue cannot be combined with --workers or --resume.", fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+        try:
+            create_queue(generation_config, str(queue), unit_batches, lease_seconds)
+        except ValueError as e:
+            typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+        return
+    if cache_dir is not None:
+        generation_config.cache_config.cache_dir = str(cache_dir)
+    if no_cache:
+        generation_config.cache_config.enabled = False
+
+    stage_profiler = None
+    if profile or profiler_tool:
+        from synthetic_cli.generation.profiling import StageProfiler
+
+        try:
+            stage_profiler = StageProfiler(enabled=True, tool=profiler_tool)
+        except ValueError as e:
+            typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+
+    reporter = None
+    if progress_json:
+        from synthetic_cli.generation.progress import JsonLinesReporter
+
+        reporter = JsonLinesReporter.open(progress_json)
+
+    try:
+        output_path = generate_data(
+            generation_config,
+            workers=workers,
+            resume_path=str(resume) if resume else None,
+            on_progress=reporter,
+            profiler=stage_profiler,
+            use_server=not no_server,
+        )
+    except ValueError as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    finally:
+        if reporter is not None:
+            reporter.close()
+    if output_path is None:
+        raise typer.Exit(code=1)
+
+@app.command()
+def serve(
+    socket_path: Optional[str] = typer.Option(
+        None, "--socket", help="Unix socket to listen on (default: $SYNTHETIC_CLI_SOCKET or ~/.cache/synthetic-cli/serve.sock).",
+    ),
+    max_models: int = typer.Option(2, "--max-models", min=1, help="How many loaded models to keep before unloading the least recently used."),
+):
+    """Keeps models loaded and runs generation jobs submitted by other invocations."""
+    from synthetic_cli.commands.serve import serve as run_server
+
+    try:
+        run_server(socket_path, max_models)
+    except ValueError as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+@app.command()
+def worker(
+    queue: Path = typer.Argument(..., exists=True, file_okay=False, help="Work queue directory written by 'generate --queue'."),
+    poll_seconds: float = typer.Option(10.0, "--poll", min=0.1, help="Seconds to wait before checking again while other workers hold the last units."),
+):
+    """Generates work units from a shared queue until all of them are done."""
+    from synthetic_cli.commands.workqueue import run_worker
+
+    try:
+        run_worker(str(queue), poll_seconds)
+    except ValueError as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+@app.command()
+def merge(
+    queue: Path = typer.Argument(..., exists=True, file_okay=False, help="Work queue directory whose units are all done."),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", dir_okay=False, help="Output file (default: a timestamped file in the configured output directory)."),
+    keep: bool = typer.Option(False, "--keep", help="Keep the queue directory and its shards after merging."),
+):
+    """Merges the shards of a finished work queue into one output file."""
+    from synthetic_cli.commands.workqueue import merge_queue
+
+    try:
+        merge_queue(str(queue), str(output) if output else None, keep)
+    except ValueError as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+@app.command()
+def prefetch(
+    models: Optional[List[str]] = typer.Argument(None, help="Hugging Face model ids to download."),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", exists=True, dir_okay=False, readable=True,
+        help="Also download every model this generation config uses.",
+    ),
+    revision: Optional[str] = typer.Option(
+        None, "--revision", help="Branch, tag or commit to resolve (default: main, or the config's model.revision). Needs a single model.",
+    ),
+):
+    """Downloads model snapshots for offline runs and prints the revisions to pin."""
+    from synthetic_cli.commands.prefetch import config_models, prefetch_models
+
+    entries = [(name, None) for name in models or []]
+    token = os.environ.get("HF_TOKEN")
+    if config is not None:
+        from synthetic_cli.config.loader import load_config
+
+        try:
+            generation_config = load_config(config)
+        except ValueError as e:
+            typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+        entries += [(name, pinned) for name, pinned in config_models(generation_config) if name not in dict(entries)]
+        token = generation_config.model_config.hf_token or token
+    if not entries:
+        typer.secho("Error: Name at least one model or pass --config.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    if revision is not None:
+        if len(entries) > 1:
+            names = ", ".join(name for name, _ in entries)
+            typer.secho(f"Error: --revision applies to a single model, but {len(entries)} would be prefetched ({names}).", fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+        entries = [(entries[0][0], revision)]
+    try:
+        prefetch_models(entries, token)
+    except ValueError as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+@app.command()
+def inspect(
+    output: Path = typer.Argument(..., exists=True, dir_okay=False, help="Output file of a generation run."),
+    label: Optional[str] = typer.Option(None, "--label", "-l", help="Print this label's rows as JSON lines instead of the statistics."),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n", min=0, help="Print at most this many rows (with --label)."),
+):
+    """Reports a dataset's statistics, or streams the rows of one label, from its sidecar files."""
+    from synthetic_cli.commands.inspect import print_stats, stream_label
+
+    try:
+        if label is None:
+            print_stats(str(output))
+        else:
+            for line in stream_label(str(output), label, limit):
+                typer.echo(line)
+    except ValueError as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+@app.command()
+def bench(
+    model: str = typer.Option(
+        "stub", "--model", "-m",
+        help="Model id or local path to benchmark; 'stub' uses a deterministic offline stand-in.",
+    ),
+    samples: int = typer.Option(64, "--samples", min=1, help="Number of samples to generate."),
+    batch_size: int = typer.Option(16, "--batch-size", min=1, help="Rows per output batch."),
+    inference_batch_size: int = typer.Option(8, "--inference-batch-size", min=1, help="Prompts per model call."),
+    max_new_tokens: int = typer.Option(64, "--max-new-tokens", min=1, help="Token budget per sample."),
+    json_path: Optional[str] = typer.Option(
+        None, "--json", help="Write machine-readable results to this file ('-' for stdout).",
+    ),
+):
+    """Benchmarks the generation pipeline on a fixed, seeded workload."""
+    from synthetic_cli.commands.bench import run_benchmark, print_report, write_report
+
+    report = run_benchmark(model, samples, batch_size, inference_batch_size, max_new_tokens)
+    if json_path != "-":
+        print_report(report)
+    if json_path:
+        write_report(report, json_path)
+
 if __name__ == "__main__":
     app()
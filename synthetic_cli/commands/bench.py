@@ -0,0 +1,238 @@
+"""
+Contains the logic for the 'bench' command, a fixed and seeded benchmark
+of the generation pipeline.
+
+The workload is always the same configuration, seed and sample count, so
+results are comparable across releases and hardware. By default it runs
+against a deterministic stub model that needs no network or weights, which
+measures the harness itself (prompt building, parsing, writing); passing a
+local model path benchmarks real inference.
+"""
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from synthetic_cli.config.models import GenerationConfig, UseCaseConfig, ModelConfig, OutputConfig, CacheConfig
+
+console = Console()
+
+BENCH_SEED = 1234
+
+STUB_MODEL = "stub"
+
+def bench_config(model: str, samples: int, batch_size: int, inference_batch_size: int, max_new_tokens: int) -> GenerationConfig:
+    """Builds the fixed benchmark workload."""
+    return GenerationConfig(
+        use_case_config=UseCaseConfig(
+            use_case="text classification",
+            labels=["positive", "negative", "neutral"],
+            label_descriptions=(
+                "positive: the customer is satisfied\n"
+                "negative: the customer is unhappy\n"
+                "neutral: the customer states a fact without sentiment"
+            ),
+            categories_types={
+                "customer_service": ["complaint", "inquiry", "compliment"],
+                "sales": ["pre-sale question", "post-sale support"],
+            },
+            prompt_examples=(
+                "LABEL: positive\nCATEGORY: customer_service\nTYPE: compliment\n"
+                "OUTPUT: Thank you so much for the excellent service!\n"
+                "REASONING: This expresses gratitude and praise, indicating positive sentiment.\n\n"
+                "LABEL: negative\nCATEGORY: customer_service\nTYPE: complaint\n"
+                "OUTPUT: I am very disappointed with the product quality.\n"
+                "REASONING: This expresses disappointment, indicating negative sentiment."
+            ),
+        ),
+        model_config=ModelConfig(
+            model=model,
+            backend="stub" if model == STUB_MODEL else "hf",
+            max_new_tokens=max_new_tokens,
+            inference_batch_size=inference_batch_size,
+            hf_token=os.environ.get("HF_TOKEN"),
+        ),
+        output_config=OutputConfig(sample_size=samples, batch_size=batch_size, seed=BENCH_SEED),
+        cache_config=CacheConfig(enabled=False),
+    )
+
+class StepTimer:
+    """
+    A generation streamer that timestamps decoding steps.
+
+    transformers calls `put` once with the prompt and then once per decoding
+    step, so the time until the second call is the prefill (plus the first
+    token) and everything after it is decode.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token = None
+        self.calls = 0
+        self.tokens = 0
+
+    def put(self, value):
+        self.calls += 1
+        if self.calls == 1:
+            return
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.tokens += value.numel() if hasattr(value, "numel") else len(value)
+
+    def end(self):
+        pass
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """Returns the nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+def _peak_rss_bytes() -> Optional[int]:
+    """Returns the process's peak resident set size, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _package_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("synthetic-cli")
+    except Exception:
+        return "unknown"
+
+def run_benchmark(
+    model: str = STUB_MODEL,
+    samples: int = 64,
+    batch_size: int = 16,
+    inference_batch_size: int = 8,
+    max_new_tokens: int = 64,
+) -> Dict[str, Any]:
+    """Runs the benchmark workload and returns its measurements."""
+    from synthetic_cli.commands.generate import DataGenerator
+    from synthetic_cli.generation.rows import RowBatch
+
+    config = bench_config(model, samples, batch_size, inference_batch_size, max_new_tokens)
+    generator = DataGenerator(config)
+
+    load_start = time.perf_counter()
+    generator._initialize_backend()
+    load_seconds = time.perf_counter() - load_start
+
+    latencies = []
+    prefill_seconds = decode_seconds = write_seconds = 0.0
+    decode_tokens = 0
+    batch_bytes = []
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        sink = generator.create_sink(os.path.join(output_dir, "bench.csv"))
+        sink.open()
+        run_start = time.perf_counter()
+        for batch_num in range(generator.num_batches()):
+            samples_in_batch = generator._plan_batch(batch_num)
+            batch = RowBatch(model)
+            for start in range(0, len(samples_in_batch), inference_batch_size):
+                chunk = samples_in_batch[start:start + inference_batch_size]
+                timer = StepTimer()
+                generator.generate_kwargs["streamer"] = timer
+                results = generator._generate_batch(chunk)
+                finished = time.perf_counter()
+
+                first_token = timer.first_token or finished
+                prefill_seconds += first_token - timer.start
+                decode_seconds += finished - first_token
+                decode_tokens += timer.tokens
+                latencies.extend([finished - timer.start] * len(chunk))
+                for (label, _, _), (text, reasoning) in zip(chunk, results):
+                    batch.append(text, label, reasoning)
+            batch_bytes.append(batch.nbytes())
+
+            write_start = time.perf_counter()
+            sink.write_batch(batch_num, batch)
+            write_seconds += time.perf_counter() - write_start
+        run_seconds = time.perf_counter() - run_start
+        sink.close()
+    generator.generate_kwargs.pop("streamer", None)
+    peak_rss = _peak_rss_bytes()
+
+    # Only report torch if the workload loaded it; a stub run never does.
+    torch = sys.modules.get("torch")
+    torch_version = torch.__version__ if torch else None
+    torch_threads = torch.get_num_threads() if torch else None
+
+    return {
+        "version": _package_version(),
+        "workload": {
+            "model": model,
+            "samples": samples,
+            "batch_size": batch_size,
+            "inference_batch_size": inference_batch_size,
+            "max_new_tokens": max_new_tokens,
+            "seed": BENCH_SEED,
+        },
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch_version,
+            "torch_threads": torch_threads,
+        },
+        "results": {
+            "load_seconds": load_seconds,
+            "run_seconds": run_seconds,
+            "prefill_seconds": prefill_seconds,
+            "decode_seconds": decode_seconds,
+            "write_seconds": write_seconds,
+            "decode_tokens": decode_tokens,
+            "decode_tokens_per_second": decode_tokens / decode_seconds if decode_seconds else 0.0,
+            "samples_per_second": samples / run_seconds if run_seconds else 0.0,
+            "latency_p50_seconds": _percentile(latencies, 50),
+            "latency_p95_seconds": _percentile(latencies, 95),
+            "peak_rss_bytes": peak_rss,
+            "peak_batch_bytes": max(batch_bytes, default=0),
+            "mean_batch_bytes": sum(batch_bytes) / len(batch_bytes) if batch_bytes else 0.0,
+        },
+    }
+
+def print_report(report: Dict[str, Any]):
+    """Prints benchmark results as a table."""
+    results = report["results"]
+    table = Table(title=f"Benchmark: {report['workload']['model']} ({report['workload']['samples']} samples)")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_row("Model load", f"{results['load_seconds']:.3f} s")
+    table.add_row("Prefill", f"{results['prefill_seconds']:.3f} s")
+    table.add_row("Decode", f"{results['decode_seconds']:.3f} s")
+    table.add_row("Write", f"{results['write_seconds']:.3f} s")
+    table.add_row("Decode tokens/s", f"{results['decode_tokens_per_second']:.1f}")
+    table.add_row("Samples/s", f"{results['samples_per_second']:.2f}")
+    table.add_row("Latency p50", f"{results['latency_p50_seconds'] * 1000:.1f} ms")
+    table.add_row("Latency p95", f"{results['latency_p95_seconds'] * 1000:.1f} ms")
+    table.add_row("Batch buffer (peak)", f"{results['peak_batch_bytes'] / 2**10:.1f} KiB")
+    if results["peak_rss_bytes"] is not None:
+        table.add_row("Peak RSS", f"{results['peak_rss_bytes'] / 2**20:.1f} MiB")
+    console.print(table)
+
+def write_report(report: Dict[str, Any], path: str):
+    """Writes the benchmark results as JSON, to a file or to stdout for '-'."""
+    payload = json.dumps(report, indent=2)
+    if path == "-":
+        print(payload)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
@@ -1,68 +1,109 @@
 """
 Contains the core logic for the 'generate' command, orchestrating the
 synthetic data generation process.
+
+Model access goes through a generation backend (see
+synthetic_cli.generation.backends), which imports transformers or its HTTP
+client only when loaded, keeping this module cheap to import from the CLI
+and the TUI.
 """
 
 import os
-import re
 import random
+import time
 from datetime import datetime
-from typing import Tuple, List, Dict
+from collections import Counter
+from typing import Tuple, List, Dict, Iterator, Optional
 
-import pandas as pd
 from rich.console import Console
-from huggingface_hub import login
-from transformers import pipeline, AutoTokenizer
 
 from synthetic_cli.config.models import GenerationConfig
+from synthetic_cli.generation.manifest import RunManifest, config_hash
+from synthetic_cli.generation.datastats import DatasetStats, RowIndex
+from synthetic_cli.generation.sinks import OutputSink, sink_class, output_extension
+from synthetic_cli.generation.cache import open_cache
+from synthetic_cli.generation.backends import GenerationBackend, create_backend
+from synthetic_cli.generation.scheduler import BatchJob, OrderedTurns, run_scheduled
+from synthetic_cli.generation.progress import ProgressListener, ProgressTracker
+from synthetic_cli.generation.profiling import StageProfiler
+from synthetic_cli.generation.parsing import create_parser
+from synthetic_cli.generation.budget import TokenBudget
+from synthetic_cli.generation.planner import SamplePlanner, grouped_order
+from synthetic_cli.generation.dedup import DedupStats, DuplicateIndex
+from synthetic_cli.generation.verify import LabelVerifier, VerifyStats
+from synthetic_cli.generation.rows import RowBatch
+from synthetic_cli.generation.templates import SlottedConversation
 
 console = Console()
 
+# Stand in for the per-sample prompt fields when compiling the prompt template.
+SLOTS = ("\x00LABEL\x00", "\x00CATEGORY\x00", "\x00TYPE\x00")
+
 class DataGenerator:
     """Manages the synthetic data generation lifecycle."""
 
-    def __init__(self, config: GenerationConfig):
+    def __init__(
+        self,
+        config: GenerationConfig,
+        on_progress: Optional[ProgressListener] = None,
+        profiler: Optional[StageProfiler] = None,
+        backend: Optional[GenerationBackend] = None,
+    ):
         self.config = config
-        self.tokenizer = None
-        self.generator = None
-
-    def _login_to_hf(self):
-        """Logs into Hugging Face using the provided token."""
-        token = self.config.model_config.hf_token
-        if not token:
-            console.print("[bold red]Error: Hugging Face token is not provided.[/bold red]")
-            raise ValueError("HF_TOKEN is required.")
-        login(token)
-
-    def _initialize_pipeline(self):
-        """Initializes the tokenizer and text generation pipeline."""
-        console.print(f"[bold blue]Initializing model: {self.config.model_config.model}...[/bold blue]")
-        self._login_to_hf()
-        self.tokenizer = AutoTokenizer.from_pretrained(self.config.model_config.model)
-        self.generator = pipeline(
-            "text-generation",
-            model=self.config.model_config.model,
-            tokenizer=self.tokenizer,
+        self.profiler = profiler or StageProfiler()
+        # A backend passed in may already be loaded (e.g. by the serve daemon).
+        self.backend = backend or create_backend(config.model_config)
+        self.backend.profiler = self.profiler
+        self._backend_ready = False
+        self.parser = create_parser(config.model_config.output_mode)
+        self.token_budget = TokenBudget(config.model_config.max_new_tokens, config.model_config.adaptive_max_new_tokens)
+        self.cache = None
+        # Extra keyword arguments forwarded to every generate call (e.g. a streamer).
+        self.generate_kwargs: Dict = {}
+        seed = config.output_config.seed
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        self.planner = self._create_planner()
+        dedup_conf = config.dedup_config
+        self.dedup = DuplicateIndex(dedup_conf.mode, dedup_conf.threshold, dedup_conf.capacity) if dedup_conf.mode else None
+        self.dedup_stats = DedupStats()
+        # Batches check the duplicate index in output order, set up by `run`.
+        self._dedup_turns: Optional[OrderedTurns] = None
+        verify_conf = config.verify_config
+        self.verifier = (
+            LabelVerifier(verify_conf, config.use_case_config.labels, config.model_config.hf_token, config.model_config.offline)
+            if verify_conf.model else None
         )
+        self.verify_stats = VerifyStats()
+        self.parse_failures: Counter = Counter()
+        # Statistics of the output being written, set up by `run`.
+        self.dataset_stats: Optional[DatasetStats] = None
+        self.progress = ProgressTracker(on_progress, self.num_batches(), self.parse_failures)
+
+    def _create_planner(self) -> SamplePlanner:
+        output_conf = self.config.output_config
+        return SamplePlanner(self.config.use_case_config, output_conf.sample_size, output_conf.batch_size, self.seed)
+
+    def _initialize_backend(self):
+        """Loads the generation backend and tells it what every prompt looks like."""
+        with self.profiler.stage("backend_load"):
+            if not self.backend.loaded:
+                self.backend.load()
+            self.backend.set_prompt_template(self._build_messages(*SLOTS), SLOTS)
+        self._backend_ready = True
+
+    def _parse_output(self, text: str, fallbacks: Optional[List[Optional[str]]] = None) -> Tuple[str, str]:
+        """
+        Parses the model's output to extract the generated text and reasoning.
 
-    def _parse_output(self, text: str) -> Tuple[str, str]:
-        """Parses the model's output to extract the generated text and reasoning."""
-        match = re.search(r"OUTPUT:\s*(.+?)\s*REASONING:\s*(.+)", text, re.DOTALL)
-        if match:
-            return match.group(1).strip(), match.group(2).strip()
-        
-        match = re.search(r"output:\s*(.+?)\s*reasoning:\s*(.+)", text, re.DOTALL | re.IGNORECASE)
-        if match:
-            console.print("[yellow]Warning: Model used lowercase format.[/yellow]")
-            return match.group(1).strip(), match.group(2).strip()
-
-        match = re.search(r"OUTPUT:\s*(.+)", text, re.DOTALL)
-        if match:
-            console.print("[yellow]Warning: No REASONING found.[/yellow]")
-            return match.group(1).strip(), "No reasoning provided"
-
-        console.print("[yellow]Warning: Response format not recognized. Using raw output.[/yellow]")
-        return text.strip(), "Format not recognized"
+        How the output failed to follow the format, or None, is appended to
+        `fallbacks` when given.
+        """
+        output, reasoning, fallback = self.parser.parse(text)
+        if fallback is not None:
+            self.parse_failures[fallback] += 1
+        if fallbacks is not None:
+            fallbacks.append(fallback)
+        return output, reasoning
 
     def _build_prompt(self, label: str, category: str, type_name: str) -> str:
         """Constructs the prompt for the language model."""
@@ -79,77 +120,565 @@ class DataGenerator:
 
         Generate one output for the classification below.
         You may use the examples I have provided as a guide, but you cannot simply modify or rewrite them.
-        Only return the OUTPUT and REASONING.
+        {self._answer_instructions()}
         Do not return the LABEL, CATEGORY, or TYPE.
 
         LABEL: {label}
         CATEGORY: {category}
         TYPE: {type_name}
-        OUTPUT:
-        REASONING:
+        {self._answer_template()}
         """
 
-    def _generate_sample(self, label: str, category: str, type_name: str) -> Tuple[str, str]:
-        """Generates a single data sample."""
+    def _answer_instructions(self) -> str:
+        """Tells the model how to format its answer for the configured output mode."""
+        if self.config.model_config.output_mode == "json":
+            return 'Only return a single JSON object with the keys "output" and "reasoning", and nothing after it.'
+        return "Only return the OUTPUT and REASONING."
+
+    def _answer_template(self) -> str:
+        if self.config.model_config.output_mode == "json":
+            return '{"output": "...", "reasoning": "..."}'
+        return "OUTPUT:\n        REASONING:"
+
+    def _build_messages(self, label: str, category: str, type_name: str) -> List[Dict[str, str]]:
+        """Wraps the prompt in the chat messages sent to the pipeline."""
         prompt = self._build_prompt(label, category, type_name)
-        messages = [
+        return SlottedConversation([
             {
                 "role": "system",
                 "content": f"You are a helpful assistant designed to generate synthetic data for {self.config.use_case_config.use_case}."
             },
             {"role": "user", "content": prompt},
+        ], (label, category, type_name))
+
+    def _build_conversations(self, samples: List[Tuple[str, str, str]]) -> List[List[Dict[str, str]]]:
+        """Builds the messages of every sample, once per distinct (label, category, type)."""
+        built: Dict[Tuple[str, str, str], List[Dict[str, str]]] = {}
+        for sample in samples:
+            if sample not in built:
+                built[sample] = self._build_messages(*sample)
+        return [built[sample] for sample in samples]
+
+    def _complete(self, conversations: List[List[Dict[str, str]]], max_new_tokens: int, seed: Optional[int] = None) -> List[str]:
+        """Runs the model on a list of conversations and returns the raw completions."""
+        if not self._backend_ready:
+            self._initialize_backend()
+        with self.profiler.stage("model_call"):
+            completions = self.backend.generate(conversations, max_new_tokens, seed, **self.generate_kwargs)
+        self._record_lengths(completions, max_new_tokens)
+        return completions
+
+    async def _acomplete(self, conversations: List[List[Dict[str, str]]], max_new_tokens: int, seed: Optional[int] = None) -> List[str]:
+        """Async variant of `_complete`."""
+        if not self._backend_ready:
+            self._initialize_backend()
+        with self.profiler.stage("model_call"):
+            completions = await self.backend.agenerate(conversations, max_new_tokens, seed, **self.generate_kwargs)
+        self._record_lengths(completions, max_new_tokens)
+        return completions
+
+    def _record_lengths(self, completions: List[str], max_new_tokens: int):
+        """Feeds the token length of fresh completions to the progress and token budget."""
+        with self.profiler.stage("token_count"):
+            lengths = self.backend.token_lengths(completions)
+        self.progress.add_tokens(sum(lengths))
+        self.token_budget.observe(lengths, max_new_tokens)
+
+    def _parse_all(self, outputs: List[str], fallbacks: Optional[List[Optional[str]]] = None) -> List[Tuple[str, str]]:
+        """Parses a list of raw completions."""
+        with self.profiler.stage("parse"):
+            return [self._parse_output(output, fallbacks) for output in outputs]
+
+    def _cache_keys(self, conversations: List[List[Dict[str, str]]], sample_indices: List[int], max_new_tokens: int) -> List[str]:
+        """Returns the completion cache key of every conversation."""
+        model_conf = self.config.model_config
+        sampling = dict(self.backend.sampling_params())
+        if model_conf.stop_strings:
+            sampling["stop_strings"] = list(model_conf.stop_strings)
+        return [
+            self.cache.make_key(model_conf.model, messages, max_new_tokens, sampling, self.seed, index)
+            for messages, index in zip(conversations, sample_indices)
         ]
-        
-        result = self.generator(messages, max_new_tokens=self.config.model_config.max_new_tokens)[0]["generated_text"][-1]["content"]
-        return self._parse_output(result)
-
-    def run(self):
-        """Executes the full data generation process."""
-        self._initialize_pipeline()
-        
+
+    def _generate_batch(
+        self,
+        samples: List[Tuple[str, str, str]],
+        sample_indices: Optional[List[int]] = None,
+        seed: Optional[int] = None,
+    ) -> List[Tuple[str, str]]:
+        """
+        Generates one data sample per (label, category, type) triple in a single pipeline call.
+
+        When `sample_indices` gives each sample's position in the run and the
+        completion cache is enabled, previously generated samples are read
+        from the cache and only the misses are sent to the model.
+        """
+        max_new_tokens = self.token_budget.current()
+        with self.profiler.stage("prompt_building"):
+            conversations = self._build_conversations(samples)
+
+        if self.cache is None or sample_indices is None:
+            return self._parse_all(self._complete(conversations, max_new_tokens, seed))
+
+        with self.profiler.stage("cache_lookup"):
+            keys = self._cache_keys(conversations, sample_indices, max_new_tokens)
+            outputs = self.cache.get_many(keys)
+        missing = [position for position, key in enumerate(keys) if key not in outputs]
+        if missing:
+            completions = self._complete([conversations[position] for position in missing], max_new_tokens, seed)
+            fresh = {keys[position]: completion for position, completion in zip(missing, completions)}
+            with self.profiler.stage("cache_store"):
+                self.cache.put_many(fresh)
+            outputs.update(fresh)
+        return self._parse_all([outputs[key] for key in keys])
+
+    async def _agenerate_batch(
+        self,
+        samples: List[Tuple[str, str, str]],
+        sample_indices: Optional[List[int]] = None,
+        seed: Optional[int] = None,
+        fallbacks: Optional[List[Optional[str]]] = None,
+    ) -> List[Tuple[str, str]]:
+        """
+        Async variant of `_generate_batch`, used by the scheduled run loop.
+
+        The parse result of every completion is appended to `fallbacks`
+        when given (see `_parse_output`).
+        """
+        max_new_tokens = self.token_budget.current()
+        with self.profiler.stage("prompt_building"):
+            conversations = self._build_conversations(samples)
+
+        if self.cache is None or sample_indices is None:
+            return self._parse_all(await self._acomplete(conversations, max_new_tokens, seed), fallbacks)
+
+        with self.profiler.stage("cache_lookup"):
+            keys = self._cache_keys(conversations, sample_indices, max_new_tokens)
+            outputs = self.cache.get_many(keys)
+        missing = [position for position, key in enumerate(keys) if key not in outputs]
+        if missing:
+            completions = await self._acomplete([conversations[position] for position in missing], max_new_tokens, seed)
+            fresh = {keys[position]: completion for position, completion in zip(missing, completions)}
+            with self.profiler.stage("cache_store"):
+                self.cache.put_many(fresh)
+            outputs.update(fresh)
+        return self._parse_all([outputs[key] for key in keys], fallbacks)
+
+    def _generate_sample(self, label: str, category: str, type_name: str) -> Tuple[str, str]:
+        """Generates a single data sample."""
+        return self._generate_batch([(label, category, type_name)])[0]
+
+    def _output_path(self) -> str:
+        """
+        Creates a fresh, empty timestamped output file inside the output directory and returns its path.
+
+        Names go down to the microsecond and the file is created
+        exclusively, so runs started at the same moment, e.g. concurrent
+        jobs of the serve daemon, never share an output file.
+        """
+        output_conf = self.config.output_config
+        extension = output_extension(output_conf.output_format, output_conf.compression)
+        os.makedirs(output_conf.output_dir, exist_ok=True)
+        while True:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            path = os.path.join(output_conf.output_dir, f"{timestamp}{extension}")
+            try:
+                os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+            except FileExistsError:
+                continue
+            return path
+
+    def columns(self) -> List[str]:
+        """Returns the output columns for this configuration."""
+        columns = ["text", "label", "model"]
+        if self.config.output_config.save_reasoning:
+            columns.append("reasoning")
+        if self.verifier is not None:
+            columns.append("confidence")
+        return columns
+
+    def create_sink(self, output_path: str) -> OutputSink:
+        """Builds the output sink selected by the output configuration."""
         output_conf = self.config.output_config
-        use_case_conf = self.config.use_case_config
+        return sink_class(output_conf.output_format)(output_path, self.columns(), output_conf.compression)
+
+    def num_batches(self) -> int:
+        """Returns how many output batches the configured sample size spans."""
+        output_conf = self.config.output_config
+        return (output_conf.sample_size + output_conf.batch_size - 1) // output_conf.batch_size
+
+    def batch_bounds(self, batch_num: int) -> Tuple[int, int]:
+        """Returns the [start, end) sample indices covered by a batch."""
+        output_conf = self.config.output_config
+        start_index = batch_num * output_conf.batch_size
+        return start_index, min(start_index + output_conf.batch_size, output_conf.sample_size)
+
+    def _plan_batch(self, batch_num: int) -> List[Tuple[str, str, str]]:
+        """
+        Picks the (label, category, type) triple for every sample in a batch.
+
+        The planner fixes exact per-class quotas for the whole run and
+        depends only on the run seed, so any batch can be regenerated
+        identically without replaying the ones before it.
+        """
+        return self.planner.batch(batch_num)
+
+    def _open_manifest(self, output_path: str, resume: bool) -> RunManifest:
+        """Creates a fresh run manifest, or loads and validates one when resuming."""
+        expected_hash = config_hash(self.config)
+        if not resume:
+            manifest = RunManifest(output_path, expected_hash, self.seed, self.num_batches())
+            manifest.save()
+            return manifest
+
+        manifest = RunManifest.load(output_path)
+        if manifest.config_hash != expected_hash:
+            console.print("[bold red]Error: The configuration differs from the one that produced this output.[/bold red]")
+            raise ValueError("Cannot resume a run with a different configuration.")
+        seed = self.config.output_config.seed
+        if seed is not None and seed != manifest.seed:
+            raise ValueError(f"Configured seed {seed} does not match the run's seed {manifest.seed}.")
+        self.seed = manifest.seed
+        self.planner = self._create_planner()
+        return manifest
+
+    def _jobs(self, batch_nums: List[int]) -> Iterator[BatchJob]:
+        """Lazily plans the given batches, in order."""
+        for batch_num in batch_nums:
+            start_index, end_index = self.batch_bounds(batch_num)
+            yield BatchJob(batch_num, self._plan_batch(batch_num), list(range(start_index, end_index)))
+
+    async def _agenerate_grouped(
+        self,
+        samples: List[Tuple[str, str, str]],
+        sample_indices: Optional[List[int]],
+        seed: int,
+        fallbacks: Optional[List[Optional[str]]] = None,
+    ) -> List[Tuple[str, str]]:
+        """Generates samples with identical prompts next to each other, so they share inference batches."""
+        order = grouped_order(samples)
+        grouped = await self._agenerate_batch(
+            [samples[position] for position in order],
+            [sample_indices[position] for position in order] if sample_indices is not None else None,
+            seed,
+            fallbacks,
+        )
+        results = [None] * len(grouped)
+        for position, result in zip(order, grouped):
+            results[position] = result
+        return results
+
+    async def _filter_rows(
+        self, job: BatchJob, results: List[Tuple[str, str]], fallbacks: List[Optional[str]]
+    ) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str]], List[Optional[float]]]:
+        """
+        Checks a batch with the label verifier and the duplicate index and returns the rows to keep.
+
+        Returns the kept samples, their results and their label confidence
+        (None without a verifier). Rows whose text does not match their
+        label, or duplicates an earlier row, are regenerated for the same
+        (label, category, type) up to `verify.retries` or `dedup.retries`
+        times and dropped after that; with `verify.on_mismatch: drop`
+        mismatches are dropped straight away. Regenerated rows are checked
+        again from the start. Retries bypass the completion cache, whose
+        entries are keyed by position, and add their parse results to
+        `fallbacks`.
+
+        Verification runs as soon as the batch is generated, but a batch
+        only starts checking the duplicate index once the previous batch
+        has finished filtering, so the index sees rows in output order
+        whatever the concurrency, just like the index a resumed run
+        rebuilds from the written rows.
+        """
+        verify_conf = self.config.verify_config
+        dedup_conf = self.config.dedup_config
+        confidences: List[Optional[float]] = [None] * len(job.samples)
+        pending = list(range(len(job.samples)))
+        keep = []
+        attempt = 0
+        while pending:
+            if attempt:
+                retry_samples = [job.samples[position] for position in pending]
+                # Distinct from every batch seed of the run.
+                seed = self.seed + job.batch_num + attempt * self.num_batches()
+                for position, result in zip(pending, await self._agenerate_grouped(retry_samples, None, seed, fallbacks)):
+                    results[position] = result
+
+            checked, retry = pending, []
+            if self.verifier is not None:
+                with self.profiler.stage("verify"):
+                    scores = await self.verifier.ascore(
+                        [results[position][0] for position in checked],
+                        [job.samples[position][0] for position in checked],
+                    )
+                matched = []
+                for position, score in zip(checked, scores):
+                    label = job.samples[position][0]
+                    is_match = self.verifier.matches(label, score)
+                    self.verify_stats.record(label, score[0], is_match)
+                    confidences[position] = round(score[1], 4)
+                    if is_match:
+                        matched.append(position)
+                    elif verify_conf.on_mismatch == "regenerate" and attempt < verify_conf.retries:
+                        self.verify_stats.regenerated[label] += 1
+                        retry.append(position)
+                    else:
+                        self.verify_stats.dropped[label] += 1
+                checked = matched
+
+            if self.dedup is not None:
+                if not attempt and self._dedup_turns is not None:
+                    await self._dedup_turns.wait(job.batch_num)
+                unique = []
+                with self.profiler.stage("dedup"):
+                    for position in checked:
+                        kind = self.dedup.add(results[position][0])
+                        self.dedup_stats.record(job.samples[position], kind)
+                        if kind is None:
+                            unique.append(position)
+                        elif attempt < dedup_conf.retries:
+                            self.dedup_stats.regenerated[job.samples[position]] += 1
+                            retry.append(position)
+                        else:
+                            self.dedup_stats.dropped[job.samples[position]] += 1
+                checked = unique
+
+            keep.extend(checked)
+            pending = sorted(retry)
+            attempt += 1
+
+        if self.dedup is not None and self._dedup_turns is not None:
+            self._dedup_turns.finish(job.batch_num)
+        keep.sort()
+        return (
+            [job.samples[position] for position in keep],
+            [results[position] for position in keep],
+            [confidences[position] for position in keep],
+        )
+
+    async def _generate_job(self, job: BatchJob) -> RowBatch:
+        """Generates a planned batch and returns its output rows."""
         model_conf = self.config.model_config
+        output_conf = self.config.output_config
+        self.progress.batch_started(job.batch_num)
+        fallbacks: List[Optional[str]] = []
+        results = await self._agenerate_grouped(job.samples, job.sample_indices, self.seed + job.batch_num, fallbacks)
+        samples, confidences = job.samples, [None] * len(results)
+        if self.verifier is not None or self.dedup is not None:
+            samples, results, confidences = await self._filter_rows(job, results, fallbacks)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs(output_conf.output_dir, exist_ok=True)
-        output_path = os.path.join(output_conf.output_dir, f"{timestamp}.csv")
-
-        num_batches = (output_conf.sample_size + output_conf.batch_size - 1) // output_conf.batch_size
-        console.print(f"[bold green]Starting generation of {output_conf.sample_size} samples in {num_batches} batches...[/bold green]")
-
-        for batch_num in range(num_batches):
-            batch_data = []
-            start_index = batch_num * output_conf.batch_size
-            end_index = min(start_index + output_conf.batch_size, output_conf.sample_size)
-
-            for i in range(start_index, end_index):
-                label = random.choice(use_case_conf.labels)
-                category = random.choice(list(use_case_conf.categories_types.keys()))
-                type_name = random.choice(use_case_conf.categories_types[category])
-
-                text, reasoning = self._generate_sample(label, category, type_name)
-                
-                entry = {"text": text, "label": label, "model": model_conf.model}
-                if output_conf.save_reasoning:
-                    entry["reasoning"] = reasoning
-                batch_data.append(entry)
-
-            batch_df = pd.DataFrame(batch_data)
-            if batch_num == 0:
-                batch_df.to_csv(output_path, mode='w', index=False)
+        with self.profiler.stage("row_build"):
+            batch = RowBatch(model_conf.model, output_conf.save_reasoning, save_confidence=self.verifier is not None)
+            for (label, category, type_name), (text, reasoning), confidence in zip(samples, results, confidences):
+                batch.append(text, label, reasoning, confidence, category, type_name)
+            batch.record_parses(fallbacks)
+        if self.token_budget.adaptive:
+            job.token_budget = self.token_budget.state()
+        return batch
+
+    def _rebuild_dedup_index(self, sink: OutputSink, batch_nums: List[int]):
+        """Adds the rows a resumed run already wrote to the duplicate index."""
+        count = 0
+        for row in sink.read_rows(batch_nums):
+            self.dedup.add(row["text"])
+            count += 1
+        console.print(f"[blue]Rebuilt the duplicate index from {count} existing rows.[/blue]")
+
+    def _write_job(
+        self,
+        job: BatchJob,
+        batch: RowBatch,
+        sink: OutputSink,
+        manifest: RunManifest,
+        output_path: str,
+        index: Optional[RowIndex] = None,
+    ):
+        """Writes a finished batch, updates the statistics and row index, and records it in the manifest."""
+        with self.profiler.stage("write"):
+            checkpoint = sink.write_batch(job.batch_num, batch)
+            if index is None:
+                manifest.mark_completed(job.batch_num, checkpoint, token_budget=job.token_budget)
             else:
-                batch_df.to_csv(output_path, mode='a', header=False, index=False)
-            
-            console.print(f"[cyan]Batch {batch_num + 1}/{num_batches} saved to {output_path}[/cyan]")
+                stats = self.dataset_stats
+                stats.add_batch(batch)
+                index_bytes = index.append([stats.label_number(label) for label in batch.labels], sink.row_positions)
+                manifest.mark_completed(job.batch_num, checkpoint, index_bytes, stats.to_dict(), job.token_budget)
+        console.print(f"[cyan]Batch {job.batch_num + 1}/{self.num_batches()} saved to {output_path}[/cyan]")
+        self.progress.batch_written(job.batch_num, len(job.samples), len(batch))
 
+    def run(self, output_path: Optional[str] = None, batch_range: Optional[range] = None, resume: bool = False) -> str:
+        """
+        Executes the data generation process and returns the output path.
+
+        By default every batch is generated into a new timestamped file;
+        `output_path` and `batch_range` let a caller generate a subset of
+        the batches into a file of its choosing (used for sharded runs).
+        With `resume`, the run manifest next to `output_path` is used to
+        skip batches that were already written and append the rest.
+
+        Planning, generation and writing run as a pipeline (see
+        synthetic_cli.generation.scheduler): backends that can serve several
+        batches at once get them concurrently, while batches are still
+        written in order.
+        """
+        if resume and output_path is None:
+            raise ValueError("An output path is required to resume a run.")
+        if output_path is None:
+            output_path = self._output_path()
+
+        output_conf = self.config.output_config
+
+        manifest = self._open_manifest(output_path, resume)
+        num_batches = self.num_batches()
+        batches = batch_range if batch_range is not None else range(num_batches)
+        completed = set(manifest.completed_batches)
+        pending = [batch_num for batch_num in batches if batch_num not in completed]
+        if manifest.stats:
+            self.dataset_stats = DatasetStats.from_dict(manifest.stats)
+        elif not completed:
+            self.dataset_stats = DatasetStats(self.config.use_case_config.labels, output_conf.output_format, output_conf.compression)
+        else:
+            self.dataset_stats = None
+            console.print(f"[yellow]Warning: {output_path} was started without statistics; none will be recorded for it.[/yellow]")
+
+        if self.token_budget.adaptive and completed:
+            if manifest.token_budget:
+                self.token_budget.restore(manifest.token_budget)
+            else:
+                console.print(f"[yellow]Warning: {output_path} has no saved token budget; it will be learned again from the resumed batches.[/yellow]")
+
+        if resume:
+            console.print(f"[bold green]Resuming {output_path}: {len(batches) - len(pending)} of {len(batches)} batches already done.[/bold green]")
+        else:
+            console.print(f"[bold green]Starting generation of {output_conf.sample_size} samples in {num_batches} batches...[/bold green]")
+            counts = ", ".join(f"{label}: {count}" for label, count in self.planner.label_counts().items())
+            console.print(f"[blue]Samples per label: {counts}[/blue]")
+
+        def batch_samples(batch_num: int) -> int:
+            start_index, end_index = self.batch_bounds(batch_num)
+            return end_index - start_index
+
+        self.progress.start(
+            output_path,
+            sum(batch_samples(batch_num) for batch_num in batches),
+            sum(batch_samples(batch_num) for batch_num in batches if batch_num in completed),
+        )
+
+        if pending:
+            cache_conf = self.config.cache_config
+            if cache_conf.enabled and output_conf.seed is None:
+                console.print("[blue]Completion cache skipped: set output.seed to make completions reusable.[/blue]")
+            else:
+                self.cache = open_cache(cache_conf.cache_dir, cache_conf.max_size_mb, cache_conf.enabled)
+
+            # Opening for resume drops anything past the last completed batch,
+            # e.g. a batch that was only partially written when the previous run died.
+            sink = self.create_sink(output_path)
+            sink.open(manifest.output_bytes if resume else None)
+            index = None
+            if self.dataset_stats is not None:
+                index = RowIndex(output_path)
+                index.open(manifest.index_bytes if resume else None)
+            if self.dedup is not None:
+                self._dedup_turns = OrderedTurns(pending)
+                if resume:
+                    self._rebuild_dedup_index(sink, manifest.completed_batches)
+            concurrency = self.backend.parallel_batches(output_conf.batch_size)
+            if self.verifier is not None:
+                # Lets the verifier score one batch while the model generates the next.
+                concurrency = max(2, concurrency)
+            run_start = time.perf_counter()
+            try:
+                with self.profiler.capture(output_path):
+                    self.backend.run_async(run_scheduled(
+                        self._jobs(pending),
+                        generate=self._generate_job,
+                        write=lambda job, batch: self._write_job(job, batch, sink, manifest, output_path, index),
+                        concurrency=concurrency,
+                        max_pending=output_conf.max_pending_batches,
+                    ))
+                    # Measured before the trace is exported, which can take a while.
+                    run_seconds = time.perf_counter() - run_start
+            except BaseException:
+                sink.abort()
+                raise
+            finally:
+                if index is not None:
+                    index.close()
+                if self.cache is not None:
+                    console.print(f"[blue]Completion cache: {self.cache.hits} hits, {self.cache.misses} misses.[/blue]")
+                    self.cache.close()
+                    self.cache = None
+                if self.verifier is not None:
+                    self.verifier.close()
+            sink.close()
+            if self.profiler.enabled:
+                self.profiler.write_report(output_path, run_seconds)
+
+        budget = self.token_budget
+        if budget.adaptive and budget.observed:
+            console.print(
+                f"[blue]Adaptive token budget: {budget.current()} of {budget.max_new_tokens} max new tokens "
+                f"({budget.truncated} of {budget.observed} completions reached their budget).[/blue]"
+            )
+        self.backend.report()
+        if self.dedup is not None:
+            self.dedup_stats.report()
+        self.verify_stats.report()
+        if self.parse_failures:
+            details = ", ".join(f"{kind}: {count}" for kind, count in sorted(self.parse_failures.items()))
+            console.print(f"[yellow]Warning: {sum(self.parse_failures.values())} outputs did not follow the expected format ({details}).[/yellow]")
+        self.dataset_stats = None
+        self._dedup_turns = None
+        self.progress.finish()
         console.print(f"[bold green]Data generation complete. Output saved to {output_path}[/bold green]")
+        return output_path
+
+def generate_data(
+    config: GenerationConfig,
+    workers: int = 1,
+    resume_path: Optional[str] = None,
+    on_progress: Optional[ProgressListener] = None,
+    profiler: Optional[StageProfiler] = None,
+    use_server: bool = True,
+) -> Optional[str]:
+    """
+    Initializes and runs the data generator, returning the output path.
 
-def generate_data(config: GenerationConfig):
-    """Initializes and runs the data generator."""
+    With more than one worker the run is sharded across processes, each
+    loading its own copy of the model. `resume_path` continues an
+    interrupted run in that output file instead of starting a new one.
+    `on_progress` receives a `ProgressEvent` as the run advances, and
+    `profiler` times each stage and writes a report next to the output.
+
+    When a `synthetic-cli serve` daemon is running, single-process runs are
+    submitted to it so they reuse its loaded model (unless `use_server` is
+    False or the run is profiled, which needs to happen in this process).
+    """
     if not config.is_valid():
         console.print("[bold red]Configuration is invalid. Please check your settings.[/bold red]")
-        return
+        return None
+
+    if workers > 1:
+        if resume_path:
+            console.print("[bold red]Resuming is not supported for sharded runs.[/bold red]")
+            return None
+        from synthetic_cli.commands.shard import run_sharded
+
+        if on_progress is not None or profiler is not None:
+            console.print("[yellow]Warning: Progress events and profiling are not available for sharded runs.[/yellow]")
+        return run_sharded(config, workers)
+
+    if use_server and profiler is None:
+        from synthetic_cli.commands.serve import server_running, submit_job
+
+        if server_running():
+            return submit_job(config, resume_path, on_progress)
 
-    generator = DataGenerator(config)
-    generator.run()
+    generator = DataGenerator(config, on_progress, profiler)
+    try:
+        if resume_path:
+            return generator.run(output_path=resume_path, resume=True)
+        return generator.run()
+    finally:
+        generator.backend.close()
@@ -0,0 +1,78 @@
+"""
+Reports on a generated dataset from its sidecars instead of reading it.
+
+`synthetic-cli inspect OUTPUT` prints the statistics recorded in the run
+manifest: rows per label, category and type, text lengths per label and
+the parse-failure rate. With `--label`, it streams that label's rows as
+JSON lines, seeking to each through the row index (see
+synthetic_cli.generation.datastats).
+"""
+
+import json
+from typing import Iterator, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from synthetic_cli.generation.datastats import DatasetStats, label_rows, load_stats
+from synthetic_cli.generation.manifest import RunManifest
+
+console = Console()
+
+def _counts_table(title: str, counts, total: int) -> Table:
+    table = Table(title=title)
+    table.add_column("Value")
+    table.add_column("Rows", justify="right")
+    table.add_column("Share", justify="right")
+    for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+        table.add_row(value or "-", str(count), f"{count / total:.1%}" if total else "-")
+    return table
+
+def _bin_range(bin_number: int) -> str:
+    low = 0 if bin_number == 0 else 2 ** bin_number
+    return f"{low}-{2 ** (bin_number + 1) - 1}"
+
+def _lengths_table(stats: DatasetStats) -> Table:
+    table = Table(title="Text length (characters)")
+    table.add_column("Label")
+    table.add_column("Mean", justify="right")
+    table.add_column("Most common", justify="right")
+    table.add_column("Histogram")
+    for label in stats.labels:
+        histogram = stats.length_histograms.get(label)
+        count = stats.label_counts.get(label, 0)
+        if not histogram or not count:
+            continue
+        peak = max(histogram)
+        bars = " ".join(f"{_bin_range(bin_number)}: {bin_count}" for bin_number, bin_count in enumerate(histogram) if bin_count)
+        table.add_row(
+            label,
+            f"{stats.length_totals[label] / count:.0f}",
+            _bin_range(histogram.index(peak)),
+            bars,
+        )
+    return table
+
+def print_stats(output_path: str):
+    """Prints the statistics recorded for an output file."""
+    manifest = RunManifest.load(output_path)
+    stats = load_stats(manifest)
+    done = len(set(manifest.completed_batches))
+    status = "complete" if manifest.is_complete() else f"{done} of {manifest.num_batches} batches written"
+    console.print(f"[bold]{output_path}[/bold]: {stats.rows} rows ({status})")
+    console.print(_counts_table("Labels", stats.label_counts, stats.rows))
+    console.print(_counts_table("Categories", stats.category_counts, stats.rows))
+    console.print(_counts_table("Types", stats.type_counts, stats.rows))
+    console.print(_lengths_table(stats))
+    failures = sum(stats.parse_failures.values())
+    if stats.completions:
+        details = ", ".join(f"{kind}: {count}" for kind, count in sorted(stats.parse_failures.items()))
+        console.print(
+            f"Parse failures: {failures} of {stats.completions} completions ({failures / stats.completions:.1%})"
+            f"{f' ({details})' if details else ''}."
+        )
+
+def stream_label(output_path: str, label: str, limit: Optional[int] = None) -> Iterator[str]:
+    """Yields the rows of one label as JSON lines."""
+    for row in label_rows(output_path, label, limit):
+        yield json.dumps(row, ensure_ascii=False)
@@ -0,0 +1,58 @@
+"""
+Downloads the models of a run ahead of time for offline generation.
+
+`synthetic-cli prefetch` resolves each model to a commit hash, downloads
+that snapshot into the Hugging Face cache (see
+synthetic_cli.generation.snapshots) and prints the revision to pin. Models
+of a config are fetched at the revision it pins, if any. Copy
+the cache to hosts without network access, or share it, and run there
+with `model.revision` set and `model.offline: true` (or `generate
+--offline`).
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+from synthetic_cli.config.models import GenerationConfig
+from synthetic_cli.generation.snapshots import prefetch
+
+console = Console()
+
+def config_models(config: GenerationConfig) -> List[Tuple[str, Optional[str]]]:
+    """
+    Returns every Hub model a run loads, with the revision to fetch.
+
+    That is the model and its draft when the `hf` backend loads them, and
+    the label verifier. Only the model can pin a revision.
+    """
+    model_conf = config.model_config
+    entries = [(config.verify_config.model, None)]
+    if model_conf.backend == "hf":
+        entries = [(model_conf.model, model_conf.revision), (model_conf.draft_model, None)] + entries
+    models = []
+    for name, revision in entries:
+        if name and not os.path.isdir(name) and name not in [model for model, _ in models]:
+            models.append((name, revision))
+    return models
+
+def prefetch_models(models: List[Tuple[str, Optional[str]]], token: Optional[str] = None) -> List[str]:
+    """Prefetches each (model, revision) and reports the commit it was pinned to; returns the commits."""
+    table = Table(title="Prefetched models")
+    table.add_column("Model")
+    table.add_column("Revision")
+    table.add_column("Snapshot")
+    revisions = []
+    for model, revision in models:
+        console.print(f"[bold blue]Prefetching {model}{f' at {revision}' if revision else ''}...[/bold blue]")
+        sha, path = prefetch(model, revision, token)
+        table.add_row(model, sha, path)
+        revisions.append(sha)
+    console.print(table)
+    console.print(
+        "Set [bold]model.revision[/bold] to the model's revision to pin it, and "
+        "[bold]model.offline: true[/bold] (or `generate --offline`) to load only from these snapshots."
+    )
+    return revisions
@@ -0,0 +1,219 @@
+"""
+Contains the logic for the 'serve' command, a daemon that keeps models
+loaded between generation runs.
+
+Loading tokenizer and weights often takes longer than a small job itself.
+The daemon keeps a bounded, least-recently-used pool of loaded backends
+and accepts jobs over a local Unix socket. While it is running,
+`generate_data` (and so both the CLI and the TUI) submits jobs to it
+instead of loading the model in-process.
+
+The protocol is newline-delimited JSON. A client sends one request:
+
+    {"type": "generate", "config": {...}, "resume_path": null}
+
+and the server answers with any number of `{"type": "progress", "event":
+{...}}` messages followed by either `{"type": "result", "output_path":
+...}` or `{"type": "error", "message": ...}`.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from rich.console import Console
+
+from synthetic_cli.config.loader import config_from_dict, config_to_dict
+from synthetic_cli.config.models import GenerationConfig, ModelConfig
+from synthetic_cli.generation.backends import GenerationBackend, create_backend
+from synthetic_cli.generation.progress import ProgressEvent, ProgressListener
+
+console = Console()
+
+SOCKET_ENV = "SYNTHETIC_CLI_SOCKET"
+
+DEFAULT_SOCKET = "~/.cache/synthetic-cli/serve.sock"
+
+# Model settings that require a separate loaded copy. Everything else
+# (token budget, stop strings, batch sizes...) is read per call.
+_LOAD_FIELDS = (
+    "backend", "model", "revision", "offline", "draft_model", "hf_token", "api_base", "api_key", "torch_dtype", "quantization",
+    "device_map", "low_cpu_mem_usage", "use_safetensors", "num_threads", "num_interop_threads",
+)
+
+def socket_path(path: Optional[str] = None) -> str:
+    """Resolves the daemon's socket path from an argument, the environment or the default."""
+    return os.path.expanduser(path or os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET)
+
+def server_running(path: Optional[str] = None) -> bool:
+    """Returns whether a daemon is accepting connections on the socket."""
+    path = socket_path(path)
+    if not os.path.exists(path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path)
+        except OSError:
+            return False
+    return True
+
+class BackendPool:
+    """A bounded LRU of loaded backends, one job at a time per backend."""
+
+    def __init__(self, max_models: int):
+        self.max_models = max(1, max_models)
+        self._entries: "OrderedDict[Tuple, Tuple[GenerationBackend, threading.Lock]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_config: ModelConfig) -> Tuple:
+        return tuple(getattr(model_config, name) for name in _LOAD_FIELDS)
+
+    @contextmanager
+    def acquire(self, model_config: ModelConfig):
+        """Yields a backend for `model_config`, loaded by an earlier job if possible."""
+        key = self._key(model_config)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (create_backend(model_config), threading.Lock())
+            self._entries.move_to_end(key)
+            backend, in_use = self._entries[key]
+            self._evict()
+
+        with in_use:
+            # Per-run settings come from this job's configuration.
+            backend.model_config = model_config
+            yield backend
+
+    def _evict(self):
+        """Closes the least recently used idle backends beyond the pool size."""
+        for key in list(self._entries)[:-1]:
+            if len(self._entries) <= self.max_models:
+                break
+            backend, in_use = self._entries[key]
+            if in_use.acquire(blocking=False):
+                try:
+                    del self._entries[key]
+                    console.print(f"[blue]Unloading {backend.model_config.model}.[/blue]")
+                    backend.close()
+                finally:
+                    in_use.release()
+
+    def close(self):
+        with self._lock:
+            for backend, _ in self._entries.values():
+                backend.close()
+            self._entries.clear()
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Runs one generation job per connection."""
+
+    def _send(self, message: Dict):
+        with self._send_lock:
+            self.wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+    def handle(self):
+        from synthetic_cli.commands.generate import DataGenerator
+
+        self._send_lock = threading.Lock()
+        line = self.rfile.readline()
+        if not line.strip():
+            # A liveness probe from `server_running`.
+            return
+        try:
+            request = json.loads(line)
+            config = config_from_dict(request["config"])
+            resume_path = request.get("resume_path")
+            if not config.is_valid():
+                raise ValueError("Configuration is invalid. Please check your settings.")
+
+            console.print(f"[bold blue]Job: {config.output_config.sample_size} samples with {config.model_config.model}[/bold blue]")
+            with self.server.pool.acquire(config.model_config) as backend:
+                # A client that disconnects makes this raise, which aborts the run resumably.
+                on_progress = lambda event: self._send({"type": "progress", "event": event.to_dict()})
+                generator = DataGenerator(config, on_progress, backend=backend)
+                if resume_path:
+                    output_path = generator.run(output_path=resume_path, resume=True)
+                else:
+                    output_path = generator.run()
+            self._send({"type": "result", "output_path": output_path})
+        except Exception as e:
+            console.print(f"[bold red]Job failed: {e}[/bold red]")
+            try:
+                self._send({"type": "error", "message": str(e)})
+            except OSError:
+                pass
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(path: Optional[str] = None, max_models: int = 2):
+    """Runs the daemon until interrupted."""
+    path = socket_path(path)
+    if server_running(path):
+        raise ValueError(f"A server is already running on {path}.")
+    if os.path.exists(path):
+        # Left behind by a daemon that did not shut down cleanly.
+        os.remove(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    server = _Server(path, _JobHandler)
+    # Jobs carry tokens; only the owner may connect.
+    os.chmod(path, 0o600)
+    server.pool = BackendPool(max_models)
+    # Stop on SIGTERM as on Ctrl+C, so the socket and loaded models are cleaned up.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    console.print(f"[bold green]Serving on {path} (up to {max_models} loaded models). Press Ctrl+C to stop.[/bold green]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+def submit_job(
+    config: GenerationConfig,
+    resume_path: Optional[str] = None,
+    on_progress: Optional[ProgressListener] = None,
+    path: Optional[str] = None,
+) -> str:
+    """Runs a job on the daemon and returns the output path."""
+    path = socket_path(path)
+    payload = config_to_dict(config)
+    # The daemon has its own working directory.
+    payload["output"]["output_dir"] = os.path.abspath(config.output_config.output_dir)
+    request = {
+        "type": "generate",
+        "config": payload,
+        "resume_path": os.path.abspath(resume_path) if resume_path else None,
+    }
+
+    console.print(f"[bold blue]Submitting job to the generation server at {path}...[/bold blue]")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with client.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                message = json.loads(line)
+                if message["type"] == "progress":
+                    event = ProgressEvent(**message["event"])
+                    if on_progress is not None:
+                        on_progress(event)
+                    elif event.kind == "batch_written":
+                        console.print(f"[cyan]Batch {event.batch + 1}/{event.num_batches} saved to {event.output_path}[/cyan]")
+                elif message["type"] == "result":
+                    console.print(f"[bold green]Data generation complete. Output saved to {message['output_path']}[/bold green]")
+                    return message["output_path"]
+                elif message["type"] == "error":
+                    raise ValueError(message["message"])
+    raise ValueError("The generation server closed the connection before the job finished.")
@@ -0,0 +1,145 @@
+"""
+Splits a generation run across worker processes on one host.
+
+Each worker owns a contiguous range of output batches, loads its own copy
+of the model with a share of the CPU threads, and writes a shard file in
+the configured output format. The shards are then merged, in batch order,
+into the single timestamped output file a serial run would produce.
+"""
+
+import os
+import copy
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from synthetic_cli.config.models import GenerationConfig
+from synthetic_cli.generation.datastats import index_path, merge_sidecars
+from synthetic_cli.generation.manifest import RunManifest, config_hash
+from synthetic_cli.generation.sinks import sink_class
+
+console = Console()
+
+def split_batches(num_batches: int, workers: int) -> List[range]:
+    """Divides batch indices into at most `workers` contiguous, near-equal ranges."""
+    workers = max(1, min(workers, num_batches))
+    base, extra = divmod(num_batches, workers)
+    ranges = []
+    start = 0
+    for shard in range(workers):
+        size = base + (1 if shard < extra else 0)
+        ranges.append(range(start, start + size))
+        start += size
+    return ranges
+
+def threads_per_worker(workers: int) -> int:
+    """Gives each worker an equal share of the host's CPU cores."""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def _run_shard(config: GenerationConfig, shard: int, batch_range: range, shard_path: str, num_threads: int) -> Dict:
+    """Worker entrypoint: generates one shard and reports its timings."""
+    # Thread pools are sized when torch is first imported, so the
+    # environment must be set before the backend pulls it in.
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+    # The worker's share of the cores replaces any configured thread count.
+    config.model_config.num_threads = num_threads
+    from synthetic_cli.commands.generate import DataGenerator
+
+    generator = DataGenerator(config)
+    load_start = time.perf_counter()
+    generator._initialize_backend()
+    load_seconds = time.perf_counter() - load_start
+
+    run_start = time.perf_counter()
+    generator.run(output_path=shard_path, batch_range=batch_range)
+    run_seconds = time.perf_counter() - run_start
+
+    samples = sum(end - start for start, end in map(generator.batch_bounds, batch_range))
+    return {
+        "shard": shard,
+        "batches": len(batch_range),
+        "samples": samples,
+        "threads": num_threads,
+        "load_seconds": load_seconds,
+        "run_seconds": run_seconds,
+    }
+
+def _print_throughput(results: List[Dict]):
+    """Prints per-worker throughput so the worker count can be tuned."""
+    table = Table(title="Worker throughput")
+    table.add_column("Worker", justify="right")
+    table.add_column("Threads", justify="right")
+    table.add_column("Samples", justify="right")
+    table.add_column("Load (s)", justify="right")
+    table.add_column("Generate (s)", justify="right")
+    table.add_column("Samples/s", justify="right")
+
+    for result in results:
+        rate = result["samples"] / result["run_seconds"] if result["run_seconds"] else 0.0
+        table.add_row(
+            str(result["shard"]),
+            str(result["threads"]),
+            str(result["samples"]),
+            f"{result['load_seconds']:.1f}",
+            f"{result['run_seconds']:.1f}",
+            f"{rate:.2f}",
+        )
+
+    total_samples = sum(r["samples"] for r in results)
+    wall = max(r["load_seconds"] + r["run_seconds"] for r in results)
+    console.print(table)
+    console.print(f"[bold]Aggregate:[/bold] {total_samples / wall:.2f} samples/s over {len(results)} workers")
+
+def run_sharded(config: GenerationConfig, workers: int) -> Optional[str]:
+    """Runs generation across `workers` processes and merges the shards."""
+    from synthetic_cli.commands.generate import DataGenerator
+
+    planner = DataGenerator(config)
+    # Every worker must plan its batches from the same seed for the merged
+    # output to match a serial run.
+    config = copy.deepcopy(config)
+    if config.output_config.seed is None and config.cache_config.enabled:
+        # The pinned seed is never reused, so neither would the cached completions.
+        console.print("[blue]Completion cache skipped: set output.seed to make completions reusable.[/blue]")
+        config.cache_config.enabled = False
+    config.output_config.seed = planner.seed
+    output_path = planner._output_path()
+    shard_ranges = split_batches(planner.num_batches(), workers)
+    num_threads = threads_per_worker(len(shard_ranges))
+    shard_paths = [f"{output_path}.shard{shard}" for shard in range(len(shard_ranges))]
+
+    console.print(f"[bold green]Sharding {planner.num_batches()} batches across {len(shard_ranges)} workers ({num_threads} threads each)...[/bold green]")
+
+    # torch is not fork-safe once initialized, so workers are always spawned.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shard_ranges), mp_context=context) as executor:
+        futures = [
+            executor.submit(_run_shard, config, shard, batch_range, shard_path, num_threads)
+            for shard, (batch_range, shard_path) in enumerate(zip(shard_ranges, shard_paths))
+        ]
+        results = [future.result() for future in futures]
+
+    output_conf = config.output_config
+    starts = sink_class(output_conf.output_format).concat(shard_paths, output_path, output_conf.compression)
+    stats, index_bytes = merge_sidecars(shard_paths, output_path, output_conf.output_format, starts, output_conf.compression)
+    for shard_path in shard_paths:
+        os.remove(shard_path)
+        os.remove(RunManifest.path_for(shard_path))
+        if os.path.exists(index_path(shard_path)):
+            os.remove(index_path(shard_path))
+
+    num_batches = planner.num_batches()
+    RunManifest(
+        output_path, config_hash(config), planner.seed, num_batches,
+        completed_batches=list(range(num_batches)), output_bytes=os.path.getsize(output_path),
+        index_bytes=index_bytes, stats=stats,
+    ).save()
+
+    _print_throughput(results)
+    console.print(f"[bold green]Data generation complete. Output saved to {output_path}[/bold green]")
+    return output_path
@@ -0,0 +1,286 @@
+"""
+Spreads a generation run over any number of hosts through a shared directory.
+
+`generate --queue DIR` (the coordinator) plans the run and writes it to a
+directory every host can reach, e.g. an NFS mount, as work units of a few
+output batches each. `synthetic-cli worker DIR` processes, started on as
+many hosts as needed, claim units one at a time, generate them into shard
+files next to the queue, and mark them done. `synthetic-cli merge DIR`
+stitches the shards, in unit order, into a single output file, exactly as
+a sharded run on one host does. Deduplication and the adaptive token
+budget apply per unit, as they apply per shard there: each unit starts
+with an empty duplicate index and a fresh budget, so the output matches
+the units generated one by one rather than a serial run.
+
+The directory holds:
+
+* `queue.json`: the run configuration (with the seed pinned and secrets
+  left out), the unit size and the lease duration;
+* `leases/unit-NNNNN.K`: attempt K at unit N. A lease is taken by
+  hard-linking a fully written temporary file to its name, which fails
+  if it already exists, so only one worker wins each attempt. The holder
+  touches the file regularly; once its modification time is older than
+  the lease duration, another worker may take attempt K + 1;
+* `shards/`: one output file per attempt, so a worker whose lease was
+  taken over never writes into the new holder's file;
+* `done/unit-NNNNN`: linked into place by the first attempt to finish,
+  naming the shard to merge.
+
+Every unit is generated from the run seed, so whichever attempt finishes
+first produces the same rows. Hosts need loosely synchronized clocks
+compared to the lease duration.
+"""
+
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+from rich.console import Console
+
+from synthetic_cli.config.loader import config_from_dict, config_to_dict
+from synthetic_cli.config.models import GenerationConfig
+from synthetic_cli.generation.datastats import merge_sidecars
+from synthetic_cli.generation.manifest import RunManifest, config_hash
+from synthetic_cli.generation.sinks import output_extension, sink_class
+
+console = Console()
+
+QUEUE_FILE = "queue.json"
+
+def _write_exclusive(path: str, data: Dict) -> bool:
+    """Creates `path` with JSON content unless it exists; atomic on local and NFS filesystems."""
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    try:
+        os.link(tmp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp_path)
+
+class Lease:
+    """One worker's claim on one attempt at a work unit."""
+
+    def __init__(self, queue: "WorkQueue", unit: int, attempt: int):
+        self.queue = queue
+        self.unit = unit
+        self.attempt = attempt
+        self.path = os.path.join(queue.root, "leases", f"unit-{unit:05d}.{attempt}")
+        self.shard_path = os.path.join(queue.root, "shards", f"unit-{unit:05d}.{attempt}{queue.extension}")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _renew(self):
+        while not self._stop.wait(self.queue.lease_seconds / 4):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return
+
+    def __enter__(self) -> "Lease":
+        self._thread = threading.Thread(target=self._renew, name=f"synthetic-cli-lease-{self.unit}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        if exc_type is not None:
+            # Give the unit back right away instead of waiting for the lease to expire.
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def complete(self, worker: str) -> bool:
+        """Marks the unit done with this attempt's shard; False if another attempt finished first."""
+        done_path = os.path.join(self.queue.root, "done", f"unit-{self.unit:05d}")
+        return _write_exclusive(done_path, {"shard": os.path.basename(self.shard_path), "worker": worker})
+
+class WorkQueue:
+    """A planned run on a shared filesystem, split into work units."""
+
+    def __init__(self, root: str):
+        self.root = root
+        spec_path = os.path.join(root, QUEUE_FILE)
+        if not os.path.exists(spec_path):
+            raise ValueError(f"No work queue found at {root}.")
+        with open(spec_path, "r", encoding="utf-8") as f:
+            self.spec = json.load(f)
+        self.num_batches = self.spec["num_batches"]
+        self.unit_batches = self.spec["unit_batches"]
+        self.lease_seconds = self.spec["lease_seconds"]
+        output_conf = self.spec["config"]["output"]
+        self.extension = output_extension(output_conf.get("output_format", "csv"), output_conf.get("compression"))
+
+    @classmethod
+    def create(cls, root: str, config: GenerationConfig, num_batches: int, unit_batches: int, lease_seconds: float) -> "WorkQueue":
+        """Writes a run's plan to an empty directory."""
+        if os.path.isdir(root) and os.listdir(root):
+            raise ValueError(f"The queue directory {root} is not empty.")
+        for name in ("leases", "shards", "done"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+        payload = config_to_dict(config)
+        # The queue lives on a shared filesystem; workers read tokens from their own environment.
+        payload["model"].pop("hf_token", None)
+        payload["model"].pop("api_key", None)
+        spec = {
+            "config": payload,
+            "config_hash": config_hash(config),
+            "num_batches": num_batches,
+            "unit_batches": unit_batches,
+            "lease_seconds": lease_seconds,
+        }
+        tmp_path = os.path.join(root, f"{QUEUE_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(spec, f, indent=2)
+        os.replace(tmp_path, os.path.join(root, QUEUE_FILE))
+        return cls(root)
+
+    def config(self) -> GenerationConfig:
+        """Rebuilds the run configuration, with this host's tokens."""
+        return config_from_dict(self.spec["config"])
+
+    def num_units(self) -> int:
+        return (self.num_batches + self.unit_batches - 1) // self.unit_batches
+
+    def batch_range(self, unit: int) -> range:
+        start = unit * self.unit_batches
+        return range(start, min(start + self.unit_batches, self.num_batches))
+
+    def done_units(self) -> Dict[int, str]:
+        """Returns the shard file of every finished unit."""
+        done = {}
+        done_dir = os.path.join(self.root, "done")
+        for name in os.listdir(done_dir):
+            if name.startswith("unit-") and not name.endswith(".tmp"):
+                with open(os.path.join(done_dir, name), "r", encoding="utf-8") as f:
+                    done[int(name[5:])] = os.path.join(self.root, "shards", json.load(f)["shard"])
+        return done
+
+    def _latest_attempts(self) -> Dict[int, int]:
+        latest: Dict[int, int] = {}
+        for name in os.listdir(os.path.join(self.root, "leases")):
+            if not name.startswith("unit-") or name.endswith(".tmp"):
+                continue
+            unit, attempt = name[5:].split(".")
+            latest[int(unit)] = max(latest.get(int(unit), -1), int(attempt))
+        return latest
+
+    def claim(self, worker: str) -> Optional[Lease]:
+        """Takes the first unit that is neither done nor held by a live lease."""
+        done = self.done_units()
+        latest = self._latest_attempts()
+        now = time.time()
+        for unit in range(self.num_units()):
+            if unit in done:
+                continue
+            attempt = latest.get(unit)
+            if attempt is not None:
+                current = Lease(self, unit, attempt)
+                try:
+                    if now - os.stat(current.path).st_mtime < self.lease_seconds:
+                        continue
+                except FileNotFoundError:
+                    # Released after a failure since the directory was listed.
+                    pass
+                console.print(f"[yellow]Warning: The lease on unit {unit + 1} expired; taking it over.[/yellow]")
+            lease = Lease(self, unit, 0 if attempt is None else attempt + 1)
+            if _write_exclusive(lease.path, {"worker": worker, "claimed_at": now}):
+                return lease
+        return None
+
+def create_queue(config: GenerationConfig, root: str, unit_batches: int = 10, lease_seconds: float = 300.0) -> WorkQueue:
+    """Plans a run into a shared work queue (the coordinator)."""
+    from synthetic_cli.commands.generate import DataGenerator
+
+    if unit_batches < 1:
+        raise ValueError("Work units need at least one batch.")
+    if lease_seconds <= 0:
+        raise ValueError("The lease duration must be positive.")
+    planner = DataGenerator(config)
+    # A pinned seed makes each unit reproducible, whichever attempt finishes it.
+    config.output_config.seed = planner.seed
+    queue = WorkQueue.create(root, config, planner.num_batches(), unit_batches, lease_seconds)
+    console.print(
+        f"[bold green]Queued {queue.num_batches} batches as {queue.num_units()} work units in {root}.[/bold green]\n"
+        f"Start workers with `synthetic-cli worker {root}` on any host that can reach it, "
+        f"then run `synthetic-cli merge {root}`."
+    )
+    return queue
+
+def run_worker(root: str, poll_seconds: float = 10.0) -> int:
+    """
+    Claims and generates work units until every unit is done; returns how many this worker finished.
+
+    The backend is loaded once and shared, but every unit gets a fresh
+    DataGenerator, so its duplicate index, token budget and statistics
+    start from scratch, exactly as in a sharded run.
+    """
+    from synthetic_cli.commands.generate import DataGenerator
+    from synthetic_cli.generation.backends import create_backend
+
+    queue = WorkQueue(root)
+    config = queue.config()
+    if config_hash(config) != queue.spec["config_hash"]:
+        raise ValueError("The queued configuration cannot be rebuilt by this version of synthetic-cli.")
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    backend = create_backend(config.model_config)
+    finished = 0
+    console.print(f"[bold green]Worker {worker} joined the queue at {root}.[/bold green]")
+    try:
+        while True:
+            lease = queue.claim(worker)
+            if lease is None:
+                if len(queue.done_units()) == queue.num_units():
+                    break
+                # The remaining units are held by other workers; wait in case a lease expires.
+                time.sleep(poll_seconds)
+                continue
+            batches = queue.batch_range(lease.unit)
+            console.print(f"[bold blue]Unit {lease.unit + 1}/{queue.num_units()}: batches {batches.start + 1}-{batches.stop}[/bold blue]")
+            with lease:
+                DataGenerator(config, backend=backend).run(output_path=lease.shard_path, batch_range=batches)
+            if lease.complete(worker):
+                finished += 1
+            else:
+                console.print(f"[yellow]Warning: Unit {lease.unit + 1} was finished by another worker first; discarding this copy.[/yellow]")
+    finally:
+        backend.close()
+    console.print(f"[bold green]All work units are done; this worker finished {finished}.[/bold green]")
+    return finished
+
+def merge_queue(root: str, output_path: Optional[str] = None, keep: bool = False) -> str:
+    """Concatenates the finished shards of a queue, in order, into one output file."""
+    from synthetic_cli.commands.generate import DataGenerator
+
+    queue = WorkQueue(root)
+    done = queue.done_units()
+    missing = [unit for unit in range(queue.num_units()) if unit not in done]
+    if missing:
+        raise ValueError(f"{len(missing)} of {queue.num_units()} work units are not done yet (first: unit {missing[0] + 1}).")
+
+    config = queue.config()
+    if output_path is None:
+        output_path = DataGenerator(config)._output_path()
+    output_conf = config.output_config
+    shard_paths = [done[unit] for unit in range(queue.num_units())]
+    starts = sink_class(output_conf.output_format).concat(shard_paths, output_path, output_conf.compression)
+    stats, index_bytes = merge_sidecars(shard_paths, output_path, output_conf.output_format, starts, output_conf.compression)
+    RunManifest(
+        output_path, queue.spec["config_hash"], output_conf.seed, queue.num_batches,
+        completed_batches=list(range(queue.num_batches)), output_bytes=os.path.getsize(output_path),
+        index_bytes=index_bytes, stats=stats,
+    ).save()
+    if not keep:
+        shutil.rmtree(root)
+    console.print(f"[bold green]Merged {len(shard_paths)} work units. Output saved to {output_path}[/bold green]")
+    return output_path
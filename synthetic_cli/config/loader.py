@@ -0,0 +1,134 @@
+"""
+Loads a GenerationConfig from a JSON or YAML file for headless runs.
+
+The file mirrors the configuration groups used by the TUI:
+
+    use_case:
+      labels: [positive, negative]
+      categories_types: {customer_service: [complaint, inquiry]}
+    model:
+      model: HuggingFaceTB/SmolLM2-1.7B-Instruct
+    output:
+      sample_size: 1000
+
+Any field left out keeps its dataclass default, and every value is checked
+against its field's type (integers are accepted where a float is
+expected). The Hugging Face token may
+be omitted from the file and supplied through the HF_TOKEN environment
+variable instead.
+"""
+
+import json
+import os
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Any, Dict, Type, TypeVar, Union, get_args, get_origin
+
+from synthetic_cli.config.models import GenerationConfig, UseCaseConfig, ModelConfig, OutputConfig, CacheConfig, DedupConfig, VerifyConfig
+
+T = TypeVar("T")
+
+SECTIONS = {
+    "use_case": ("use_case_config", UseCaseConfig),
+    "model": ("model_config", ModelConfig),
+    "output": ("output_config", OutputConfig),
+    "cache": ("cache_config", CacheConfig),
+    "dedup": ("dedup_config", DedupConfig),
+    "verify": ("verify_config", VerifyConfig),
+}
+
+def _type_name(annotation) -> str:
+    origin = get_origin(annotation)
+    if origin is Union:
+        return " or ".join(_type_name(arg) for arg in get_args(annotation))
+    if origin is not None:
+        return f"{origin.__name__}[{', '.join(_type_name(arg) for arg in get_args(annotation))}]"
+    return "null" if annotation is type(None) else annotation.__name__
+
+def _check_value(annotation, value: Any) -> Any:
+    """Returns `value` if it matches `annotation`, with ints turned into floats where needed; raises TypeError otherwise."""
+    origin = get_origin(annotation)
+    if origin is Union:
+        for arg in get_args(annotation):
+            try:
+                return _check_value(arg, value)
+            except TypeError:
+                pass
+    elif origin is list:
+        if isinstance(value, list):
+            (item_type,) = get_args(annotation)
+            return [_check_value(item_type, item) for item in value]
+    elif origin is dict:
+        if isinstance(value, dict):
+            key_type, value_type = get_args(annotation)
+            return {_check_value(key_type, key): _check_value(value_type, item) for key, item in value.items()}
+    elif annotation is type(None):
+        if value is None:
+            return value
+    elif annotation is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif annotation is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif isinstance(value, annotation):
+        return value
+    raise TypeError
+
+def _build_section(cls: Type[T], name: str, data: Dict[str, Any]) -> T:
+    """Instantiates one configuration dataclass, rejecting unknown keys and values of the wrong type."""
+    if not isinstance(data, dict):
+        raise ValueError(f"Section '{name}' must be a mapping.")
+    types = {f.name: f.type for f in fields(cls)}
+    unknown = set(data) - set(types)
+    if unknown:
+        raise ValueError(f"Unknown key(s) in section '{name}': {', '.join(sorted(unknown))}")
+    values = {}
+    for key, value in data.items():
+        try:
+            values[key] = _check_value(types[key], value)
+        except TypeError:
+            raise ValueError(f"'{name}.{key}' must be {_type_name(types[key])}, got {value!r}.") from None
+    return cls(**values)
+
+def config_from_dict(data: Dict[str, Any]) -> GenerationConfig:
+    """Builds a GenerationConfig from a plain dictionary."""
+    if not isinstance(data, dict):
+        raise ValueError("Configuration file must contain a mapping at the top level.")
+    unknown = set(data) - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown configuration section(s): {', '.join(sorted(unknown))}")
+
+    config = GenerationConfig()
+    for name, (attr, cls) in SECTIONS.items():
+        if name in data:
+            setattr(config, attr, _build_section(cls, name, data[name] or {}))
+
+    if not config.model_config.hf_token:
+        config.model_config.hf_token = os.environ.get("HF_TOKEN")
+    return config
+
+def config_to_dict(config: GenerationConfig) -> Dict[str, Any]:
+    """Turns a GenerationConfig back into the plain dictionary `config_from_dict` reads."""
+    return {name: asdict(getattr(config, attr)) for name, (attr, _) in SECTIONS.items()}
+
+def load_config(path: Union[str, Path]) -> GenerationConfig:
+    """Reads a .json, .yaml or .yml file into a GenerationConfig."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    text = path.read_text(encoding="utf-8")
+
+    if suffix == ".json":
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path} is not valid JSON: {e}") from e
+    elif suffix in (".yaml", ".yml"):
+        import yaml
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path} is not valid YAML: {e}") from e
+    else:
+        raise ValueError(f"Unsupported configuration format '{suffix}'. Use .json, .yaml or .yml.")
+    return config_from_dict(data)
@@ -16,13 +16,35 @@ class UseCaseConfig:
     label_descriptions: str = ""
     categories_types: Dict[str, List[str]] = field(default_factory=dict)
     prompt_examples: str = ""
+    label_weights: Dict[str, float] = field(default_factory=dict)
+    category_weights: Dict[str, float] = field(default_factory=dict)
 
 @dataclass
 class ModelConfig:
     """Configuration for the language model and generation parameters."""
     model: str = "meta-llama/Llama-3.2-3B-Instruct"
+    revision: Optional[str] = None
+    offline: bool = False
+    draft_model: Optional[str] = None
     max_new_tokens: int = 256
+    inference_batch_size: int = 8
+    prefix_cache: bool = True
     hf_token: Optional[str] = None
+    backend: str = "hf"
+    api_base: str = "http://localhost:8000/v1"
+    api_key: Optional[str] = None
+    max_concurrency: int = 32
+    request_timeout: float = 600.0
+    output_mode: str = "text"
+    stop_strings: List[str] = field(default_factory=list)
+    adaptive_max_new_tokens: bool = False
+    torch_dtype: Optional[str] = None
+    quantization: Optional[str] = None
+    device_map: Optional[str] = None
+    low_cpu_mem_usage: bool = False
+    use_safetensors: bool = False
+    num_threads: Optional[int] = None
+    num_interop_threads: Optional[int] = None
 
 @dataclass
 class OutputConfig:
@@ -31,6 +53,37 @@ class OutputConfig:
     batch_size: int = 20
     output_dir: str = "./generated_data"
     save_reasoning: bool = True
+    seed: Optional[int] = None
+    output_format: str = "csv"
+    compression: Optional[str] = None
+    max_pending_batches: int = 4
+
+@dataclass
+class CacheConfig:
+    """Configuration for the persistent cache of model completions."""
+    enabled: bool = True
+    cache_dir: str = "~/.cache/synthetic-cli"
+    max_size_mb: int = 1024
+
+@dataclass
+class DedupConfig:
+    """Configuration for detecting duplicate and near-duplicate rows."""
+    mode: Optional[str] = None
+    threshold: float = 0.8
+    retries: int = 2
+    capacity: int = 1_000_000
+
+@dataclass
+class VerifyConfig:
+    """Configuration for checking generated text against its label with a local classifier."""
+    model: Optional[str] = None
+    method: str = "zero-shot"
+    hypothesis_template: str = "This example is {}."
+    label_map: Dict[str, str] = field(default_factory=dict)
+    min_confidence: float = 0.0
+    on_mismatch: str = "regenerate"
+    retries: int = 2
+    batch_size: int = 32
 
 @dataclass
 class GenerationConfig:
@@ -38,6 +91,9 @@ class GenerationConfig:
     use_case_config: UseCaseConfig = field(default_factory=UseCaseConfig)
     model_config: ModelConfig = field(default_factory=ModelConfig)
     output_config: OutputConfig = field(default_factory=OutputConfig)
+    cache_config: CacheConfig = field(default_factory=CacheConfig)
+    dedup_config: DedupConfig = field(default_factory=DedupConfig)
+    verify_config: VerifyConfig = field(default_factory=VerifyConfig)
 
     def is_valid(self) -> bool:
         """Checks if the core configuration fields are populated."""
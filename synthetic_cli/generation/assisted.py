@@ -0,0 +1,117 @@
+"""
+Bookkeeping for assisted (speculative) decoding with a draft model.
+
+With `model.draft_model` set, the `hf` backend passes the draft to
+`transformers` as the assistant model: the draft proposes a few tokens at
+a time and the target model checks all of them in one forward pass,
+keeping the longest prefix it agrees with plus one token of its own. A
+run is faster when the draft's tokens are usually accepted, because the
+target then makes far fewer passes than it generates tokens.
+
+`AssistedDecodingStats` hooks the forward passes of both models to count
+and time them, which gives:
+
+* the acceptance rate: accepted draft tokens over proposed ones. Every
+  draft pass proposes one token, and every target pass adds exactly one
+  token of its own on top of the accepted ones;
+* tokens per target pass, the reduction in target passes;
+* an estimated speedup: the measured time against the time plain
+  decoding would have taken, one target pass per token, using the
+  measured cost of a target pass.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from rich.console import Console
+
+console = Console()
+
+def tokenizers_compatible(tokenizer, draft_tokenizer) -> bool:
+    """Whether the draft's token ids mean the same as the target's, as assisted generation requires."""
+    return tokenizer.get_vocab() == draft_tokenizer.get_vocab()
+
+class AssistedDecodingStats:
+    """Counts and times the target and draft passes of assisted generation."""
+
+    def __init__(self):
+        self.reset()
+        self._recording = False
+        self._first_pass = False
+        self._pass_start = 0.0
+
+    def reset(self):
+        self.sequences = 0
+        self.new_tokens = 0
+        self.target_passes = 0
+        self.draft_passes = 0
+        self.seconds = 0.0
+        self.first_pass_seconds = 0.0
+        self.later_pass_seconds = 0.0
+
+    def attach(self, target, draft):
+        """Hooks the forward passes of both models; calls outside `sequence()` are ignored."""
+        target.register_forward_pre_hook(self._before_target)
+        target.register_forward_hook(self._after_target)
+        draft.register_forward_hook(self._after_draft)
+
+    def _before_target(self, module, args):
+        self._pass_start = time.perf_counter()
+
+    def _after_target(self, module, args, output):
+        if not self._recording:
+            return
+        elapsed = time.perf_counter() - self._pass_start
+        self.target_passes += 1
+        if self._first_pass:
+            # The first pass also prefills the prompt.
+            self.first_pass_seconds += elapsed
+            self._first_pass = False
+        else:
+            self.later_pass_seconds += elapsed
+
+    def _after_draft(self, module, args, output):
+        if self._recording:
+            self.draft_passes += 1
+
+    @contextmanager
+    def sequence(self):
+        """Records the passes made while generating one sequence."""
+        self._recording = self._first_pass = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds += time.perf_counter() - start
+            self._recording = self._first_pass = False
+        self.sequences += 1
+
+    def acceptance_rate(self) -> Optional[float]:
+        if not self.draft_passes:
+            return None
+        accepted = max(0, self.new_tokens - self.target_passes)
+        return min(1.0, accepted / self.draft_passes)
+
+    def tokens_per_pass(self) -> Optional[float]:
+        return self.new_tokens / self.target_passes if self.target_passes else None
+
+    def estimated_speedup(self) -> Optional[float]:
+        later_passes = self.target_passes - self.sequences
+        if later_passes <= 0 or not self.seconds:
+            return None
+        # Plain decoding: the prefill pass, then one pass per further token.
+        baseline = self.first_pass_seconds + (self.new_tokens - self.sequences) * self.later_pass_seconds / later_passes
+        return baseline / self.seconds
+
+    def report(self):
+        """Prints the acceptance rate and speedup of the run, if a draft model was used."""
+        if not self.sequences:
+            return
+        acceptance = self.acceptance_rate()
+        speedup = self.estimated_speedup()
+        console.print(
+            f"[blue]Assisted decoding: {acceptance or 0:.1%} of {self.draft_passes} draft tokens accepted, "
+            f"{self.tokens_per_pass() or 0:.2f} tokens per target pass"
+            f"{f', an estimated {speedup:.2f}x speedup over plain decoding' if speedup else ''}.[/blue]"
+        )
@@ -0,0 +1,691 @@
+"""
+Generation backends that turn chat conversations into completions.
+
+`DataGenerator` builds prompts, parses results and writes output; a backend
+only answers "complete these conversations". Three are available:
+
+* `hf`: an in-process Hugging Face `transformers` text-generation
+  pipeline, with batched inference, shared-prefix KV caching and
+  optional assisted decoding with a small draft model.
+* `openai`: an OpenAI-compatible HTTP endpoint such as a local vLLM or
+  llama.cpp server, driven by many concurrent requests over a pooled
+  asyncio HTTP client so the server's continuous batching stays full.
+* `stub`: a deterministic offline stand-in used by the benchmark.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from rich.console import Console
+
+from synthetic_cli.config.models import ModelConfig
+from synthetic_cli.generation.assisted import AssistedDecodingStats, tokenizers_compatible
+from synthetic_cli.generation.profiling import StageProfiler
+from synthetic_cli.generation.snapshots import local_snapshot
+from synthetic_cli.generation.parsing import JsonObjectScanner
+from synthetic_cli.generation.templates import CompiledPrompt
+
+console = Console()
+
+Conversation = List[Dict[str, str]]
+
+# Generation parameters that change what the model samples, and so belong in
+# completion cache keys.
+SAMPLING_PARAMS = ("do_sample", "temperature", "top_k", "top_p", "repetition_penalty", "num_beams")
+
+TORCH_DTYPES = ("auto", "float32", "bfloat16", "float16")
+
+QUANTIZATION_MODES = ("dynamic-int8",)
+
+def truncate_at_stop(text: str, stop_strings: List[str]) -> str:
+    """Cuts a completion at the first stop string, which is not kept."""
+    cut = min((index for index in (text.find(stop) for stop in stop_strings if stop) if index != -1), default=-1)
+    return text if cut == -1 else text[:cut]
+
+class GenerationBackend:
+    """
+    Base class for everything that can complete chat conversations.
+
+    Backends end a completion at any of `ModelConfig.stop_strings` and
+    leave the stop string itself out of the returned text.
+    """
+
+    def __init__(self, model_config: ModelConfig):
+        self.model_config = model_config
+        self.loaded = False
+        # Replaced by the generator's profiler when a run is profiled.
+        self.profiler = StageProfiler()
+
+    def load(self):
+        """Prepares the backend (loads weights, opens connections)."""
+        self.loaded = True
+
+    def set_prompt_template(self, messages: Conversation, slots: Sequence[str]):
+        """
+        Tells the backend what every prompt of the run looks like.
+
+        `messages` is the conversation with its per-sample fields replaced
+        by the marker strings in `slots`. Backends that can reuse work
+        across prompts (a compiled template, a KV cache of the shared
+        prefix) may use it, the rest ignore it.
+        """
+
+    def sampling_params(self) -> Dict[str, Any]:
+        """Returns the sampling settings that determine completions, for cache keys."""
+        return {}
+
+    def parallel_batches(self, batch_size: int) -> int:
+        """How many batches the backend can usefully work on at once."""
+        return 1
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """Counts the tokens of each completion, approximated by words without a tokenizer."""
+        return [len(text.split()) for text in texts]
+
+    def generate(self, conversations: List[Conversation], max_new_tokens: int, seed: Optional[int] = None, **kwargs) -> List[str]:
+        """
+        Returns one completion per conversation, in order.
+
+        `seed`, when given, seeds sampling so the same call can be repeated
+        with identical results.
+        """
+        raise NotImplementedError
+
+    async def agenerate(self, conversations: List[Conversation], max_new_tokens: int, seed: Optional[int] = None, **kwargs) -> List[str]:
+        """Async variant of `generate`; runs the blocking call in a thread by default."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.generate(conversations, max_new_tokens, seed, **kwargs))
+
+    def run_async(self, coroutine):
+        """Runs a coroutine that drives this backend to completion."""
+        return asyncio.run(coroutine)
+
+    def report(self):
+        """Prints statistics the backend gathered during the run."""
+
+    def close(self):
+        """Releases resources held by the backend."""
+
+def _json_stopping_criteria(tokenizer, prompt_length: Optional[int] = None):
+    """
+    Builds a stopping criterion that ends each row once its JSON object closes.
+
+    The criterion decodes only the tokens added since its last call. A
+    transformers pipeline runs one `generate` call per sub-batch with the
+    same criterion, so it starts over whenever the sequence does not simply
+    continue the one it saw last. Assisted generation can add several tokens
+    in its first step, so it passes `prompt_length` to say where the
+    completion starts.
+    """
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class JsonObjectClosed(StoppingCriteria):
+        def __init__(self):
+            self.scanners = []
+            self.length = None
+            self.last_token = None
+
+        def __call__(self, input_ids, scores, **kwargs):
+            rows, length = input_ids.shape
+            if (
+                self.length is not None
+                and length > self.length
+                and rows == len(self.scanners)
+                and input_ids[0, self.length - 1].item() == self.last_token
+            ):
+                start = self.length
+            else:
+                self.scanners = [JsonObjectScanner() for _ in range(rows)]
+                start = length - 1 if prompt_length is None else prompt_length
+            self.length = length
+            self.last_token = input_ids[0, -1].item()
+
+            newest = tokenizer.batch_decode(input_ids[:, start:], skip_special_tokens=True)
+            done = [scanner.feed(piece) for scanner, piece in zip(self.scanners, newest)]
+            return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([JsonObjectClosed()])
+
+class HFPipelineBackend(GenerationBackend):
+    """Runs a transformers text-generation pipeline in this process."""
+
+    def __init__(self, model_config: ModelConfig):
+        super().__init__(model_config)
+        self.tokenizer = None
+        self.pipeline = None
+        self.prompt = None
+        self.prefix_ids = None
+        self.prefix_cache = None
+        self._direct = None
+        self.draft = None
+        self.assist_stats = AssistedDecodingStats()
+        self._logged_in = False
+        self._sampling = None
+        # The model is not safe to drive from several threads at once.
+        self._lock = threading.Lock()
+
+    def _login_to_hf(self):
+        """Logs into Hugging Face using the provided token."""
+        from huggingface_hub import login
+
+        # Local model directories and offline runs need no Hub access.
+        if self._logged_in or self.model_config.offline or os.path.isdir(self.model_config.model):
+            return
+        token = self.model_config.hf_token
+        if not token:
+            console.print("[bold red]Error: Hugging Face token is not provided.[/bold red]")
+            raise ValueError("HF_TOKEN is required.")
+        with self.profiler.stage("login"):
+            login(token)
+        self._logged_in = True
+
+    def _source(self, name: str, revision: Optional[str] = None):
+        """Returns where to load a model from and the revision arguments for `from_pretrained`."""
+        if self.model_config.offline:
+            # A snapshot directory is read from disk without any Hub lookups.
+            return local_snapshot(name, revision), {}
+        return name, ({"revision": revision} if revision else {})
+
+    def _model_kwargs(self) -> Dict[str, Any]:
+        """Translates the loading options of the model configuration for `from_pretrained`."""
+        import torch
+
+        conf = self.model_config
+        kwargs: Dict[str, Any] = {}
+        if conf.torch_dtype is not None:
+            if conf.torch_dtype not in TORCH_DTYPES:
+                raise ValueError(f"Unknown torch dtype '{conf.torch_dtype}'. Choose from: {', '.join(TORCH_DTYPES)}.")
+            kwargs["torch_dtype"] = conf.torch_dtype if conf.torch_dtype == "auto" else getattr(torch, conf.torch_dtype)
+        if conf.low_cpu_mem_usage:
+            kwargs["low_cpu_mem_usage"] = True
+        if conf.use_safetensors:
+            # safetensors weights are memory-mapped instead of unpickled into RAM.
+            kwargs["use_safetensors"] = True
+        return kwargs
+
+    def _set_threads(self):
+        """Applies the configured torch thread counts."""
+        import torch
+
+        if self.model_config.num_threads:
+            torch.set_num_threads(self.model_config.num_threads)
+        if self.model_config.num_interop_threads:
+            try:
+                torch.set_num_interop_threads(self.model_config.num_interop_threads)
+            except RuntimeError as e:
+                # Only allowed before torch runs any parallel work.
+                console.print(f"[yellow]Warning: Could not set interop threads ({e}).[/yellow]")
+
+    def _quantize(self):
+        """Swaps the model's linear layers for dynamically quantized int8 ones (CPU only)."""
+        import torch
+
+        mode = self.model_config.quantization
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization '{mode}'. Choose from: {', '.join(QUANTIZATION_MODES)}.")
+        model = self.pipeline.model
+        if model.device.type != "cpu":
+            raise ValueError("Dynamic int8 quantization is only supported for models on the CPU.")
+        if next(model.parameters()).dtype != torch.float32:
+            raise ValueError("Dynamic int8 quantization needs float32 weights; leave torch_dtype unset or use float32.")
+        with self.profiler.stage("quantization"):
+            self.pipeline.model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def load(self):
+        """Initializes the tokenizer and text generation pipeline."""
+        from transformers import pipeline, AutoTokenizer
+
+        console.print(f"[bold blue]Initializing model: {self.model_config.model}...[/bold blue]")
+        self._set_threads()
+        self._login_to_hf()
+        source, source_kwargs = self._source(self.model_config.model, self.model_config.revision)
+        with self.profiler.stage("tokenizer_load"):
+            self.tokenizer = AutoTokenizer.from_pretrained(source, **source_kwargs)
+        # Decoder-only models must be left-padded so every row in a batch
+        # continues from the end of its own prompt.
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        with self.profiler.stage("pipeline_construction"):
+            self.pipeline = pipeline(
+                "text-generation",
+                model=source,
+                tokenizer=self.tokenizer,
+                device_map=self.model_config.device_map,
+                model_kwargs=self._model_kwargs(),
+                **source_kwargs,
+            )
+        if self.model_config.quantization:
+            self._quantize()
+        if self.model_config.draft_model:
+            self._load_draft()
+        self.loaded = True
+
+    def _load_draft(self):
+        """Loads the draft model for assisted decoding, if its tokenizer matches the target's."""
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        name = self.model_config.draft_model
+        console.print(f"[bold blue]Initializing draft model: {name}...[/bold blue]")
+        source, _ = self._source(name)
+        with self.profiler.stage("draft_load"):
+            draft_tokenizer = AutoTokenizer.from_pretrained(source)
+            if not tokenizers_compatible(self.tokenizer, draft_tokenizer):
+                console.print(f"[yellow]Warning: {name} does not share the tokenizer of {self.model_config.model}; generating without a draft model.[/yellow]")
+                return
+            kwargs = self._model_kwargs()
+            if self.model_config.device_map:
+                kwargs["device_map"] = self.model_config.device_map
+            draft = AutoModelForCausalLM.from_pretrained(source, **kwargs)
+        model = self.pipeline.model
+        if not self.model_config.device_map:
+            draft.to(model.device)
+        draft.eval()
+        self.assist_stats.attach(model, draft)
+        self.draft = draft
+
+    def set_prompt_template(self, messages: Conversation, slots: Sequence[str]):
+        """
+        Compiles the prompt template and prefills the text shared by every sample.
+
+        Prompts are then tokenized from the compiled template instead of
+        rendering the chat template each time (see
+        synthetic_cli.generation.templates). Everything before the first
+        slot is identical across samples, so it is run through the model
+        once and its key/value cache reused; later batches only prefill
+        their own short suffix. Models whose template or cache cannot be
+        used this way fall back to the plain pipeline.
+        """
+        import torch
+
+        # A warm backend may still hold the template and statistics of a previous run.
+        self.prompt = self.prefix_ids = self.prefix_cache = self._direct = None
+        self.assist_stats.reset()
+        try:
+            with self.profiler.stage("chat_templating"):
+                prompt = CompiledPrompt(self.tokenizer, messages, slots)
+        except Exception as e:
+            console.print(f"[yellow]Warning: Prompt compilation unavailable for this model ({e}).[/yellow]")
+            return
+        self.prompt = prompt
+        # The draft model keeps a cache of its own, which a prefilled target cache would not match.
+        if not self.model_config.prefix_cache or self.draft is not None:
+            return
+        try:
+            if not prompt.prefix_ids:
+                raise ValueError("the prompt has no shared prefix")
+            prefix_ids = torch.tensor([prompt.prefix_ids])
+            model = self.pipeline.model
+            with self.profiler.stage("prefix_prefill"), torch.no_grad():
+                cache = model(input_ids=prefix_ids.to(model.device), use_cache=True).past_key_values
+            if not hasattr(cache, "batch_repeat_interleave"):
+                raise TypeError(f"{type(cache).__name__} cannot be shared across a batch")
+        except Exception as e:
+            console.print(f"[yellow]Warning: Prompt prefix caching unavailable for this model ({e}).[/yellow]")
+            return
+
+        self.prefix_ids = prompt.prefix_ids
+        self.prefix_cache = cache
+        console.print(f"[blue]Cached {len(self.prefix_ids)} shared prompt tokens.[/blue]")
+
+    def sampling_params(self) -> Dict[str, Any]:
+        """Reads the model's sampling defaults without loading its weights."""
+        if self._sampling is None:
+            from transformers import GenerationConfig as HFGenerationConfig
+
+            self._login_to_hf()
+            try:
+                source, source_kwargs = self._source(self.model_config.model, self.model_config.revision)
+                defaults = HFGenerationConfig.from_pretrained(source, **source_kwargs).to_dict()
+            except OSError:
+                defaults = {}
+            self._sampling = {name: defaults.get(name) for name in SAMPLING_PARAMS}
+            # A pinned revision, reduced precision and speculative sampling change what the model generates.
+            for name in ("revision", "torch_dtype", "quantization", "draft_model"):
+                if getattr(self.model_config, name) is not None:
+                    self._sampling[name] = getattr(self.model_config, name)
+        return self._sampling
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        if self.tokenizer is None or not texts:
+            return super().token_lengths(texts)
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False).input_ids]
+
+    def _generate_cached(self, conversations: List[Conversation], max_new_tokens: int, **kwargs) -> List[str]:
+        """
+        Generates completions on top of the cached prompt prefix.
+
+        Each row is laid out as prefix + padding + suffix: the padding sits
+        between the shared prefix and the per-sample suffix and is masked
+        out, so every row lines up with the same cached key/values.
+        """
+        import torch
+
+        model = self.pipeline.model
+        pad_id = self.tokenizer.pad_token_id
+        prefix_len = len(self.prefix_ids)
+
+        with self.profiler.stage("chat_templating"):
+            suffixes = [self.prompt.suffix_ids(messages) for messages in conversations]
+
+        width = max(len(suffix) for suffix in suffixes)
+        input_ids, attention_mask = [], []
+        for suffix in suffixes:
+            padding = width - len(suffix)
+            input_ids.append(self.prefix_ids + [pad_id] * padding + suffix)
+            attention_mask.append([1] * prefix_len + [0] * padding + [1] * len(suffix))
+
+        cache = copy.deepcopy(self.prefix_cache)
+        cache.batch_repeat_interleave(len(conversations))
+        input_ids = torch.tensor(input_ids, device=model.device)
+        with self.profiler.stage("model_generate"), torch.no_grad():
+            output = model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.tensor(attention_mask, device=model.device),
+                past_key_values=cache,
+                # Match the sampling defaults the pipeline path would use.
+                generation_config=getattr(self.pipeline, "generation_config", model.generation_config),
+                max_new_tokens=max_new_tokens,
+                pad_token_id=pad_id,
+                **kwargs,
+            )
+        return self.tokenizer.batch_decode(output[:, input_ids.shape[1]:], skip_special_tokens=True)
+
+    def generate(self, conversations: List[Conversation], max_new_tokens: int, seed: Optional[int] = None, **kwargs) -> List[str]:
+        with self._lock:
+            if seed is not None:
+                from transformers import set_seed
+
+                set_seed(seed)
+            outputs = self._generate(conversations, max_new_tokens, **kwargs)
+        if self.model_config.stop_strings:
+            # generate() stops after the stop string but keeps it.
+            outputs = [truncate_at_stop(output, self.model_config.stop_strings) for output in outputs]
+        return outputs
+
+    def report(self):
+        self.assist_stats.report()
+
+    def close(self):
+        # Drop the weights so a long-lived process can reclaim the memory.
+        self.pipeline = self.tokenizer = self.draft = None
+        self.prompt = self.prefix_ids = self.prefix_cache = self._direct = None
+        self.loaded = False
+
+    def _can_generate_direct(self, conversations: List[Conversation]) -> bool:
+        """Whether prompts can skip the pipeline and go to the model as compiled token ids."""
+        if self.prompt is None or not all(hasattr(messages, "slots") for messages in conversations):
+            return False
+        if self._direct is None:
+            # The pipeline parses replies itself for templates with a response format.
+            self._direct = (
+                getattr(self.tokenizer, "response_template", None) is None
+                and self.prompt.matches_full_tokenization(conversations[0])
+            )
+        return self._direct
+
+    def _generate_direct(self, conversations: List[Conversation], max_new_tokens: int, **kwargs) -> List[str]:
+        """Generates from compiled prompt ids, padded and decoded the way the pipeline does it."""
+        import torch
+
+        model = self.pipeline.model
+        pad_id = self.tokenizer.pad_token_id
+        with self.profiler.stage("chat_templating"):
+            prompts = [self.prompt.token_ids(messages) for messages in conversations]
+        width = max(len(ids) for ids in prompts)
+        input_ids = torch.tensor([[pad_id] * (width - len(ids)) + ids for ids in prompts], device=model.device)
+        attention_mask = torch.tensor([[0] * (width - len(ids)) + [1] * len(ids) for ids in prompts], device=model.device)
+        with self.profiler.stage("model_generate"), torch.no_grad():
+            output = model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                generation_config=getattr(self.pipeline, "generation_config", model.generation_config),
+                max_new_tokens=max_new_tokens,
+                **kwargs,
+            )
+        if "assistant_model" in kwargs:
+            # Assisted rows are generated one at a time, so none of these tokens is padding.
+            self.assist_stats.new_tokens += output[:, width:].numel()
+        return self.tokenizer.batch_decode(output[:, width:], skip_special_tokens=True, clean_up_tokenization_spaces=True)
+
+    def _generate_assisted(self, conversations: List[Conversation], max_new_tokens: int, **kwargs) -> List[str]:
+        """
+        Generates with the draft model proposing tokens for the target to verify.
+
+        transformers only supports assisted generation one row at a time,
+        so rows are not batched.
+        """
+        kwargs["assistant_model"] = self.draft
+        # The draft's own generate() would get the stop strings without a tokenizer;
+        # completions are still cut at them afterwards.
+        kwargs.pop("stop_strings", None)
+        kwargs.pop("tokenizer", None)
+        direct = self._can_generate_direct(conversations)
+        outputs = []
+        for messages in conversations:
+            if self.model_config.output_mode == "json":
+                # A step may add several tokens, so the criterion needs to know where the prompt ends.
+                if direct:
+                    prompt_length = len(self.prompt.token_ids(messages))
+                else:
+                    rendered = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+                    prompt_length = len(self.tokenizer(rendered, add_special_tokens=False).input_ids)
+                kwargs["stopping_criteria"] = _json_stopping_criteria(self.tokenizer, prompt_length)
+
+            if direct:
+                with self.assist_stats.sequence():
+                    outputs.extend(self._generate_direct([messages], max_new_tokens, **kwargs))
+                continue
+            with self.assist_stats.sequence(), self.profiler.stage("model_generate"):
+                result = self.pipeline([messages], max_new_tokens=max_new_tokens, batch_size=1, **kwargs)
+            outputs.append(result[0][0]["generated_text"][-1]["content"])
+            # The pipeline does not return token ids; count the decoded text instead.
+            self.assist_stats.new_tokens += self.token_lengths(outputs[-1:])[0]
+        return outputs
+
+    def _generate(self, conversations: List[Conversation], max_new_tokens: int, **kwargs) -> List[str]:
+        step = self.model_config.inference_batch_size
+        if self.model_config.output_mode == "json":
+            # Stop each row as soon as its answer is complete instead of running to max_new_tokens.
+            kwargs["stopping_criteria"] = _json_stopping_criteria(self.tokenizer)
+        if self.model_config.stop_strings:
+            kwargs["stop_strings"] = list(self.model_config.stop_strings)
+            kwargs["tokenizer"] = self.tokenizer
+        if self.draft is not None:
+            return self._generate_assisted(conversations, max_new_tokens, **kwargs)
+        if self.prefix_cache is not None and all(hasattr(messages, "slots") for messages in conversations):
+            try:
+                outputs = []
+                for start in range(0, len(conversations), step):
+                    outputs.extend(self._generate_cached(conversations[start:start + step], max_new_tokens, **kwargs))
+                return outputs
+            except Exception as e:
+                console.print(f"[yellow]Warning: Prompt prefix caching failed ({e}); using the full prompt from now on.[/yellow]")
+                self.prefix_cache = None
+
+        if self._can_generate_direct(conversations):
+            outputs = []
+            for start in range(0, len(conversations), step):
+                outputs.extend(self._generate_direct(conversations[start:start + step], max_new_tokens, **kwargs))
+            return outputs
+
+        # The pipeline applies the chat template itself, inside this stage.
+        with self.profiler.stage("model_generate"):
+            results = self.pipeline(conversations, max_new_tokens=max_new_tokens, batch_size=step, **kwargs)
+        return [result[0]["generated_text"][-1]["content"] for result in results]
+
+class OpenAIBackend(GenerationBackend):
+    """
+    Sends chat completion requests to an OpenAI-compatible server.
+
+    All conversations of a call are submitted concurrently, bounded by
+    `max_concurrency`, over one pooled HTTP client so the server can batch
+    them. Transient failures (connection errors, 429 and 5xx responses) are
+    retried with exponential backoff.
+    """
+
+    max_retries = 4
+
+    def __init__(self, model_config: ModelConfig):
+        super().__init__(model_config)
+        self._loop = None
+        self._client = None
+        self._client_loop = None
+        self._semaphore = None
+        # Server-reported completion token counts, consumed by token_lengths.
+        self._usage: Dict[str, int] = {}
+
+    def load(self):
+        try:
+            import httpx  # noqa: F401
+        except ImportError as e:
+            raise ValueError("The openai backend requires httpx. Install it with `pip install synthetic-cli[openai]`.") from e
+        console.print(f"[bold blue]Using OpenAI-compatible endpoint {self.model_config.api_base} for {self.model_config.model}[/bold blue]")
+        self.loaded = True
+
+    def sampling_params(self) -> Dict[str, Any]:
+        return {"api_base": self.model_config.api_base}
+
+    def parallel_batches(self, batch_size: int) -> int:
+        # Enough batches to fill every request slot, plus one so the server
+        # never idles at a batch boundary.
+        return -(-self.model_config.max_concurrency // batch_size) + 1
+
+    def _ensure_client(self):
+        """Creates the pooled client for the running event loop."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            concurrency = self.model_config.max_concurrency
+            headers = {"Authorization": f"Bearer {self.model_config.api_key}"} if self.model_config.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.model_config.api_base.rstrip("/"),
+                headers=headers,
+                timeout=self.model_config.request_timeout,
+                limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            )
+            self._client_loop = loop
+            self._semaphore = asyncio.Semaphore(concurrency)
+        return self._client
+
+    async def _complete(self, conversation: Conversation, max_new_tokens: int, seed: Optional[int]) -> str:
+        import httpx
+
+        client = self._ensure_client()
+        payload = {"model": self.model_config.model, "messages": conversation, "max_tokens": max_new_tokens}
+        if seed is not None:
+            payload["seed"] = seed
+        if self.model_config.output_mode == "json":
+            # Constrains the answer to one JSON object, so the server stops once it closes.
+            payload["response_format"] = {"type": "json_object"}
+        if self.model_config.stop_strings:
+            payload["stop"] = list(self.model_config.stop_strings)
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await client.post("/chat/completions", json=payload)
+                    response.raise_for_status()
+                    body = response.json()
+                    content = body["choices"][0]["message"]["content"] or ""
+                    usage = body.get("usage") or {}
+                    if "completion_tokens" in usage:
+                        self._usage[content] = usage["completion_tokens"]
+                    return content
+                except httpx.HTTPStatusError as e:
+                    status = e.response.status_code
+                    if (status != 429 and status < 500) or attempt == self.max_retries:
+                        raise
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def agenerate(self, conversations: List[Conversation], max_new_tokens: int, seed: Optional[int] = None, **kwargs) -> List[str]:
+        # Servers that honour per-request seeds (e.g. vLLM) then reproduce each row.
+        seeds = [None if seed is None else seed + offset for offset in range(len(conversations))]
+        return list(await asyncio.gather(
+            *(self._complete(c, max_new_tokens, s) for c, s in zip(conversations, seeds))
+        ))
+
+    def generate(self, conversations: List[Conversation], max_new_tokens: int, seed: Optional[int] = None, **kwargs) -> List[str]:
+        return self.run_async(self.agenerate(conversations, max_new_tokens, seed))
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        approximate = super().token_lengths(texts)
+        return [self._usage.pop(text, estimate) for text, estimate in zip(texts, approximate)]
+
+    def run_async(self, coroutine):
+        # A private loop keeps the pooled client alive between calls.
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
+
+    def close(self):
+        if self._client is not None and self._client_loop is self._loop and self._loop is not None:
+            self._loop.run_until_complete(self._client.aclose())
+        if self._loop is not None:
+            self._loop.close()
+        self._client = self._loop = None
+
+class StubBackend(GenerationBackend):
+    """
+    A deterministic stand-in for a real model.
+
+    Completions are derived from a hash of the prompt and the simulated cost
+    is proportional to prompt characters (prefill) and output tokens
+    (decode), so runs are repeatable and need no model download.
+    """
+
+    def __init__(self, model_config: ModelConfig, prefill_us_per_char: float = 0.5, decode_ms_per_token: float = 0.5):
+        super().__init__(model_config)
+        self.prefill_us_per_char = prefill_us_per_char
+        self.decode_ms_per_token = decode_ms_per_token
+
+    def _complete(self, messages: Conversation, max_new_tokens: int) -> str:
+        prompt = "".join(message["content"] for message in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        words = [digest[i:i + 4] for i in range(0, len(digest), 4)]
+        num_tokens = min(max_new_tokens, 8 + int(digest[:2], 16) % 24)
+        text = " ".join((words * (num_tokens // len(words) + 1))[:num_tokens])
+        if self.model_config.output_mode == "json":
+            return json.dumps({"output": text, "reasoning": "Deterministic stub completion."})
+        return f"OUTPUT: {text}\nREASONING: Deterministic stub completion."
+
+    def generate(self, conversations: List[Conversation], max_new_tokens: int, seed: Optional[int] = None, streamer=None, **kwargs) -> List[str]:
+        prompt_chars = sum(len(m["content"]) for messages in conversations for m in messages)
+        if streamer is not None:
+            streamer.put(None)
+        time.sleep(prompt_chars * self.prefill_us_per_char / 1e6)
+
+        outputs = [self._complete(messages, max_new_tokens) for messages in conversations]
+        if self.model_config.stop_strings:
+            outputs = [truncate_at_stop(output, self.model_config.stop_strings) for output in outputs]
+        steps = max(len(output.split()) for output in outputs)
+        for _ in range(steps):
+            time.sleep(self.decode_ms_per_token / 1e3)
+            if streamer is not None:
+                streamer.put([0] * len(conversations))
+        if streamer is not None:
+            streamer.end()
+        return outputs
+
+BACKENDS: Dict[str, Type[GenerationBackend]] = {
+    "hf": HFPipelineBackend,
+    "openai": OpenAIBackend,
+    "stub": StubBackend,
+}
+
+def create_backend(model_config: ModelConfig) -> GenerationBackend:
+    """Instantiates the backend selected by the model configuration."""
+    try:
+        return BACKENDS[model_config.backend](model_config)
+    except KeyError:
+        raise ValueError(f"Unknown backend '{model_config.backend}'. Choose from: {', '.join(BACKENDS)}.")
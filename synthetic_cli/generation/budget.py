@@ -0,0 +1,94 @@
+"""
+Per-run token budgets for generation.
+
+With a fixed `max_new_tokens` every row may decode up to the limit even
+when answers are far shorter. `TokenBudget` can instead learn the budget
+from the lengths of completions seen so far in the run: after a warm-up
+at the configured limit, it uses a high percentile of the observed lengths
+plus a margin, never exceeding the configured limit.
+
+Completions cut off by the budget report their length as the budget
+itself, so when more than the tail of rows hits it the percentile reaches
+the budget and the margin grows it again.
+
+The learned state is checkpointed in the run manifest with every batch
+(see `state`), so a resumed run carries on with the budget it had instead
+of warming up again. It keeps the window of lengths as a histogram, at
+most one entry per token count up to the limit, so checkpoints stay
+small. The order of the window is lost: a restored window drops its
+shortest lengths first, which errs towards a larger budget.
+"""
+
+import math
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, Iterable
+
+class TokenBudget:
+    """Decides the `max_new_tokens` to request for the next batch."""
+
+    def __init__(
+        self,
+        max_new_tokens: int,
+        adaptive: bool = False,
+        percentile: float = 99.0,
+        margin: float = 0.1,
+        min_margin_tokens: int = 8,
+        warmup: int = 32,
+        window: int = 4096,
+    ):
+        self.max_new_tokens = max_new_tokens
+        self.adaptive = adaptive
+        self.percentile = percentile
+        self.margin = margin
+        self.min_margin_tokens = min_margin_tokens
+        self.warmup = warmup
+        self.truncated = 0
+        self.observed = 0
+        self._lengths = deque(maxlen=window)
+        self._budget = max_new_tokens
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        """Returns the token budget to use for the next call."""
+        with self._lock:
+            return self._budget
+
+    def observe(self, lengths: Iterable[int], budget: int):
+        """Records the token lengths of completions generated with `budget`."""
+        with self._lock:
+            for length in lengths:
+                self.observed += 1
+                if length >= budget:
+                    self.truncated += 1
+                self._lengths.append(min(length, budget))
+            if self.adaptive and len(self._lengths) >= self.warmup:
+                self._budget = self._learn()
+
+    def state(self) -> Dict[str, Any]:
+        """Returns the learned state, to be restored with `restore`."""
+        with self._lock:
+            return {
+                "budget": self._budget,
+                # JSON object keys are strings.
+                "length_counts": {str(length): count for length, count in sorted(Counter(self._lengths).items())},
+                "observed": self.observed,
+                "truncated": self.truncated,
+            }
+
+    def restore(self, state: Dict[str, Any]):
+        """Continues from a state returned by `state`, e.g. when resuming a run."""
+        with self._lock:
+            self._lengths.clear()
+            for length, count in sorted((int(length), count) for length, count in state["length_counts"].items()):
+                self._lengths.extend([length] * count)
+            self.observed = state["observed"]
+            self.truncated = state["truncated"]
+            self._budget = min(state["budget"], self.max_new_tokens)
+
+    def _learn(self) -> int:
+        ordered = sorted(self._lengths)
+        rank = max(0, min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1))
+        tail = ordered[rank]
+        budget = tail + max(self.min_margin_tokens, math.ceil(tail * self.margin))
+        return max(1, min(self.max_new_tokens, budget))
@@ -0,0 +1,153 @@
+"""
+A persistent, size-bounded cache of raw model completions.
+
+Entries are keyed by everything that determines a completion: the model
+id, the full chat messages, the token budget, the sampling parameters and
+the run seed plus the sample's position in the run. Re-running an
+unchanged, seeded configuration (for example to try a different output
+format or to toggle `save_reasoning`) is then served from disk instead of
+the model. The raw text is stored before parsing, so parser changes still
+apply to cached rows.
+
+The cache is a single SQLite database in WAL mode, which lets the worker
+processes of a sharded run share it. Triggers keep the total size of the
+entries in a one-row table, so checking it after every write costs the
+same however large the cache is. Once it grows past its size limit the
+least recently used entries are evicted.
+
+Runs without `output.seed` draw a fresh seed every time, so their
+completions could never be looked up again; they skip the cache.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used);
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS completions_insert AFTER INSERT ON completions
+BEGIN UPDATE cache_size SET total = total + NEW.size; END;
+CREATE TRIGGER IF NOT EXISTS completions_delete AFTER DELETE ON completions
+BEGIN UPDATE cache_size SET total = total - OLD.size; END;
+CREATE TRIGGER IF NOT EXISTS completions_resize AFTER UPDATE OF size ON completions
+BEGIN UPDATE cache_size SET total = total - OLD.size + NEW.size; END;
+-- Caches created before the size table existed are summed once.
+INSERT OR IGNORE INTO cache_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM completions;
+COMMIT;
+"""
+
+class GenerationCache:
+    """SQLite-backed store of completions with LRU eviction."""
+
+    filename = "generations.sqlite"
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        cache_dir = os.path.expanduser(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, self.filename)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, str]],
+        max_new_tokens: int,
+        sampling: Dict[str, Any],
+        seed: int,
+        sample_index: int,
+    ) -> str:
+        """Hashes every input that determines a completion into a cache key."""
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "max_new_tokens": max_new_tokens,
+                "sampling": sampling,
+                "seed": seed,
+                "sample_index": sample_index,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Returns the cached completions among `keys` and marks them as used."""
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, value FROM completions WHERE key IN ({placeholders})", chunk,
+            ).fetchall()
+            found.update(rows)
+
+        if found:
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE completions SET last_used = ? WHERE key = ?", [(now, key) for key in found],
+                )
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, str]):
+        """Stores completions, then evicts old entries if over the size limit."""
+        if not items:
+            return
+        now = time.time()
+        with self._conn:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the size triggers.
+            self._conn.executemany(
+                "INSERT INTO completions (key, value, size, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, last_used = excluded.last_used",
+                [(key, value, len(value.encode("utf-8")), now) for key, value in items.items()],
+            )
+        self._evict()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits its size limit."""
+        (total,) = self._conn.execute("SELECT total FROM cache_size").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        with self._conn:
+            self._conn.executemany("DELETE FROM completions WHERE key = ?", doomed)
+
+    def close(self):
+        """Closes the database connection."""
+        self._conn.close()
+
+def open_cache(cache_dir: Optional[str], max_size_mb: int, enabled: bool = True) -> Optional[GenerationCache]:
+    """Opens the completion cache, or returns None when caching is disabled."""
+    if not enabled or not cache_dir:
+        return None
+    return GenerationCache(cache_dir, max_size_mb * 1024 * 1024)
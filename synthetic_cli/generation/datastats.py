@@ -0,0 +1,236 @@
+"""
+Dataset statistics and a per-label row index, kept up to date while a run writes.
+
+Checking class balance or pulling the rows of one label used to take a
+full read of the output file. Instead, as every batch is written:
+
+* `DatasetStats` counts rows per label, category and type, keeps a
+  text-length histogram per label (power-of-two bins, in characters) and
+  counts parsed completions and parse failures. Parse failures are
+  counted over every completion of a written batch, including ones later
+  regenerated or dropped. The statistics are stored in the run manifest,
+  so they are checkpointed atomically with the batch they include and a
+  resumed run carries on from exactly the batches already written;
+* `RowIndex` appends one fixed-size record per row to `<output>.index`:
+  the row's label and its position in the output (see
+  synthetic_cli.generation.sinks). Its size is checkpointed in the
+  manifest too, and a resumed run truncates it back, like the output.
+
+`synthetic-cli inspect` then reports the statistics without touching the
+output, and streams the rows of one label by scanning the small index and
+seeking straight to each row. Sharded and multi-host runs merge the
+statistics and indexes of their shards along with the shards themselves.
+"""
+
+import os
+import struct
+from collections import Counter
+from itertools import tee
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from synthetic_cli.generation.manifest import RunManifest
+from synthetic_cli.generation.rows import RowBatch
+from synthetic_cli.generation.sinks import Position, output_format_of, sink_class
+
+# label number, chunk, row within the chunk
+INDEX_RECORD = struct.Struct("<HQI")
+
+def index_path(output_path: str) -> str:
+    """Returns the row index path that belongs to an output file."""
+    return f"{output_path}.index"
+
+def length_bin(length: int) -> int:
+    """Histogram bin of a text length: bin b holds lengths in [2^b, 2^(b+1)), bin 0 also holds 0."""
+    return max(0, length.bit_length() - 1)
+
+class DatasetStats:
+    """Streaming counts and text-length histograms of the rows written so far."""
+
+    def __init__(self, labels: Sequence[str], output_format: Optional[str] = None, compression: Optional[str] = None):
+        self.labels: List[str] = list(labels)
+        # How the output is stored, so it can be read whatever its file name.
+        self.output_format = output_format
+        self.compression = compression
+        self._label_numbers = {label: number for number, label in enumerate(self.labels)}
+        self.rows = 0
+        self.label_counts: Counter = Counter()
+        self.category_counts: Counter = Counter()
+        self.type_counts: Counter = Counter()
+        self.length_histograms: Dict[str, List[int]] = {}
+        self.length_totals: Counter = Counter()
+        self.completions = 0
+        self.parse_failures: Counter = Counter()
+
+    def label_number(self, label: str) -> int:
+        if label not in self._label_numbers:
+            self._label_numbers[label] = len(self.labels)
+            self.labels.append(label)
+        return self._label_numbers[label]
+
+    def add_batch(self, batch: RowBatch):
+        self.rows += len(batch)
+        self.label_counts.update(batch.labels)
+        self.category_counts.update(batch.categories)
+        self.type_counts.update(f"{category}/{type_name}" for category, type_name in zip(batch.categories, batch.types))
+        for text, label in zip(batch.texts, batch.labels):
+            histogram = self.length_histograms.setdefault(label, [])
+            bin_number = length_bin(len(text))
+            if bin_number >= len(histogram):
+                histogram.extend([0] * (bin_number + 1 - len(histogram)))
+            histogram[bin_number] += 1
+            self.length_totals[label] += len(text)
+        self.completions += batch.completions
+        self.parse_failures.update(batch.parse_failures)
+
+    def merge(self, other: "DatasetStats"):
+        """Adds the statistics of another part of the same run."""
+        for label in other.labels:
+            self.label_number(label)
+        self.output_format = self.output_format or other.output_format
+        self.compression = self.compression or other.compression
+        self.rows += other.rows
+        self.label_counts.update(other.label_counts)
+        self.category_counts.update(other.category_counts)
+        self.type_counts.update(other.type_counts)
+        for label, other_histogram in other.length_histograms.items():
+            histogram = self.length_histograms.setdefault(label, [])
+            histogram.extend([0] * (len(other_histogram) - len(histogram)))
+            for bin_number, count in enumerate(other_histogram):
+                histogram[bin_number] += count
+        self.length_totals.update(other.length_totals)
+        self.completions += other.completions
+        self.parse_failures.update(other.parse_failures)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "labels": self.labels,
+            "output_format": self.output_format,
+            "compression": self.compression,
+            "rows": self.rows,
+            "label_counts": dict(self.label_counts),
+            "category_counts": dict(self.category_counts),
+            "type_counts": dict(self.type_counts),
+            "length_histograms": self.length_histograms,
+            "length_totals": dict(self.length_totals),
+            "completions": self.completions,
+            "parse_failures": dict(self.parse_failures),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DatasetStats":
+        stats = cls(data["labels"], data.get("output_format"), data.get("compression"))
+        stats.rows = data["rows"]
+        stats.label_counts.update(data["label_counts"])
+        stats.category_counts.update(data["category_counts"])
+        stats.type_counts.update(data["type_counts"])
+        stats.length_histograms = {label: list(histogram) for label, histogram in data["length_histograms"].items()}
+        stats.length_totals.update(data["length_totals"])
+        stats.completions = data["completions"]
+        stats.parse_failures.update(data["parse_failures"])
+        return stats
+
+class RowIndex:
+    """The append-only `<output>.index` file of (label, position) records."""
+
+    def __init__(self, output_path: str):
+        self.path = index_path(output_path)
+        self._file = None
+
+    def open(self, resume_bytes: Optional[int] = None):
+        """Opens the index, either fresh or truncated to a previous checkpoint."""
+        self._file = open(self.path, "ab")
+        self._file.truncate(resume_bytes or 0)
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, label_numbers: Sequence[int], positions: Sequence[Position]) -> int:
+        """Durably appends the records of one batch and returns the index size to checkpoint."""
+        self._file.write(b"".join(
+            INDEX_RECORD.pack(number, chunk, row) for number, (chunk, row) in zip(label_numbers, positions)
+        ))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def read_index(output_path: str) -> Iterator[Tuple[int, int, int]]:
+    """Yields the (label number, chunk, row) records of an output's row index."""
+    with open(index_path(output_path), "rb") as f:
+        while True:
+            data = f.read(INDEX_RECORD.size * 4096)
+            if not data:
+                return
+            yield from INDEX_RECORD.iter_unpack(data)
+
+def label_rows(output_path: str, label: str, limit: Optional[int] = None) -> Iterator[Dict]:
+    """Streams the rows of one label, seeking to each through the row index."""
+    manifest = RunManifest.load(output_path)
+    stats = load_stats(manifest)
+    output_format, compression = stats.output_format, stats.compression
+    if output_format is None:
+        output_format, compression = output_format_of(output_path)
+    if label not in stats.labels:
+        raise ValueError(f"Unknown label '{label}'. The output has: {', '.join(stats.labels)}.")
+    if not os.path.exists(index_path(output_path)):
+        raise ValueError(f"{output_path} has no row index.")
+    number = stats.labels.index(label)
+
+    def positions() -> Iterator[Position]:
+        count = 0
+        for record_label, chunk, row in read_index(output_path):
+            if record_label != number:
+                continue
+            if limit is not None and count >= limit:
+                return
+            count += 1
+            yield chunk, row
+
+    return sink_class(output_format).read_positions(output_path, positions(), compression)
+
+def load_stats(manifest: RunManifest) -> DatasetStats:
+    """Returns the statistics recorded in a run manifest."""
+    if not manifest.stats:
+        raise ValueError(f"{manifest.output_path} has no recorded statistics; it was written by an older version of synthetic-cli.")
+    return DatasetStats.from_dict(manifest.stats)
+
+def _split(records: Iterator[Tuple[int, int, int]]) -> Tuple[Iterator[int], Iterator[Position]]:
+    """Splits index records into label numbers and positions, both consumed in step."""
+    first, second = tee(records)
+    return (label for label, _, _ in first), ((chunk, row) for _, chunk, row in second)
+
+def merge_sidecars(
+    shard_paths: List[str],
+    output_path: str,
+    output_format: str,
+    starts: List[int],
+    compression: Optional[str] = None,
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Merges the statistics and row indexes of shards concatenated into `output_path`.
+
+    `starts` is what the sink's `concat` returned. Returns the merged
+    statistics and the size of the merged index, both empty if a shard
+    has none, e.g. one written by an older version.
+    """
+    manifests = [RunManifest.load(shard_path) for shard_path in shard_paths]
+    if any(not manifest.stats or not os.path.exists(index_path(path)) for manifest, path in zip(manifests, shard_paths)):
+        return {}, 0
+    sink = sink_class(output_format)
+    merged = DatasetStats([])
+    # Buffered; the merged index is made durable once at the end.
+    with open(index_path(output_path), "wb") as out:
+        for shard_path, manifest, start in zip(shard_paths, manifests, starts):
+            shard_stats = DatasetStats.from_dict(manifest.stats)
+            merged.merge(shard_stats)
+            # Label numbers differ between shards that met their labels in a different order.
+            numbers = [merged.label_number(label) for label in shard_stats.labels]
+            labels, positions = _split(read_index(shard_path))
+            for label, (chunk, row) in zip(labels, sink.shift_positions(start, positions, compression)):
+                out.write(INDEX_RECORD.pack(numbers[label], chunk, row))
+        out.flush()
+        os.fsync(out.fileno())
+        index_bytes = out.tell()
+    return merged.to_dict(), index_bytes
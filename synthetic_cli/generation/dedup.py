@@ -0,0 +1,201 @@
+"""
+Incremental detection of duplicate and near-duplicate generated text.
+
+Models often repeat themselves, and at scale many rows end up as copies or
+light rewordings of earlier ones. `DuplicateIndex` checks each row as it
+is produced:
+
+* `exact` mode compares a hash of the normalized text (lowercased, with
+  whitespace collapsed);
+* `near` mode also compares MinHash signatures of character shingles with
+  locality-sensitive hashing: the signature is split into bands, and a row
+  whose band hashes collide with an earlier row in any band is a
+  near-duplicate. The band layout is chosen so that rows above the
+  configured Jaccard similarity threshold are very likely to collide.
+
+Hashes are stored in fixed-size Bloom filters, so memory depends only on
+the configured capacity, not on how many rows the run produces. The price
+is a small, configurable rate of false positives; past the capacity that
+rate grows.
+
+`DedupStats` counts checked rows, duplicates, regenerations and drops per
+(label, category, type) cell for the end-of-run report.
+"""
+
+import hashlib
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from rich.console import Console
+
+console = Console()
+
+DEDUP_MODES = ("exact", "near")
+
+_WHITESPACE = re.compile(r"\s+")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def normalize(text: str) -> str:
+    """Lowercases text and collapses whitespace so trivial variations compare equal."""
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+def _digest(*parts: bytes) -> bytes:
+    return hashlib.blake2b(b"\x00".join(parts), digest_size=16).digest()
+
+class BloomFilter:
+    """A fixed-size set of byte strings with a bounded false-positive rate."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, digest: bytes):
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:16], "little") | 1
+        return ((first + i * second) % self.num_bits for i in range(self.num_hashes))
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    def add(self, digest: bytes):
+        for position in self._positions(digest):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Picks (bands, rows per band) for a Jaccard similarity threshold.
+
+    Minimizes the sum of the probability of missing pairs above the
+    threshold and of flagging pairs below it, as in the usual MinHash LSH
+    tuning.
+    """
+    def area(probability, low: float, high: float, steps: int = 50) -> float:
+        width = (high - low) / steps
+        return sum(probability(low + (i + 0.5) * width) for i in range(steps)) * width
+
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            collide = lambda s: 1 - (1 - s ** rows) ** bands
+            error = area(collide, 0.0, threshold) + area(lambda s: 1 - collide(s), threshold, 1.0)
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+class MinHasher:
+    """Computes MinHash signatures of character shingles."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        import numpy as np
+
+        self._np = np
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str):
+        """Returns the signature of already-normalized text."""
+        np = self._np
+        size = self.shingle_size
+        encoded = text.encode("utf-8")
+        shingles = {encoded[i:i + size] for i in range(max(1, len(encoded) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(shingle) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = ((hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=0)
+
+class DuplicateIndex:
+    """Remembers every accepted text and flags later duplicates of it."""
+
+    def __init__(self, mode: str = "near", threshold: float = 0.8, capacity: int = 1_000_000, error_rate: float = 0.001, num_perm: int = 128):
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{mode}'. Choose from: {', '.join(DEDUP_MODES)}.")
+        if not 0 < threshold < 1:
+            raise ValueError("The dedup threshold must be between 0 and 1.")
+        self.mode = mode
+        self._exact = BloomFilter(capacity, error_rate)
+        self._bands = None
+        if mode == "near":
+            self.bands, self.rows = lsh_params(threshold, num_perm)
+            self._hasher = MinHasher(self.bands * self.rows)
+            # A row is flagged if any band collides, so each band gets a share of the error budget.
+            self._bands = BloomFilter(capacity * self.bands, error_rate / self.bands)
+        self._warned = False
+
+    def add(self, text: str) -> Optional[str]:
+        """
+        Adds `text` unless it duplicates an earlier one.
+
+        Returns None for new text, or the kind of duplicate ("exact" or
+        "near"); duplicates are not added.
+        """
+        normalized = normalize(text)
+        key = _digest(normalized.encode("utf-8"))
+        if key in self._exact:
+            return "exact"
+
+        band_keys: List[bytes] = []
+        if self._bands is not None:
+            signature = self._hasher.signature(normalized)
+            for band in range(self.bands):
+                chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                band_keys.append(_digest(band.to_bytes(2, "little"), chunk))
+            if any(band_key in self._bands for band_key in band_keys):
+                return "near"
+
+        self._exact.add(key)
+        for band_key in band_keys:
+            self._bands.add(band_key)
+        if self._exact.count > self._exact.capacity and not self._warned:
+            console.print("[yellow]Warning: The duplicate index is over capacity; false positives will become more frequent. Raise dedup.capacity.[/yellow]")
+            self._warned = True
+        return None
+
+Cell = Tuple[str, str, str]
+
+class DedupStats:
+    """Per-cell counts of checked, duplicate, regenerated and dropped rows."""
+
+    def __init__(self):
+        self.checked: Counter = Counter()
+        self.duplicates: Dict[str, Counter] = {"exact": Counter(), "near": Counter()}
+        self.regenerated: Counter = Counter()
+        self.dropped: Counter = Counter()
+
+    def record(self, cell: Cell, kind: Optional[str]):
+        self.checked[cell] += 1
+        if kind is not None:
+            self.duplicates[kind][cell] += 1
+
+    def total_duplicates(self) -> int:
+        return sum(sum(counts.values()) for counts in self.duplicates.values())
+
+    def report(self, top: int = 5):
+        """Prints the overall duplicate rate and the cells with the highest rates."""
+        checked = sum(self.checked.values())
+        if not checked:
+            return
+        duplicates = self.total_duplicates()
+        console.print(
+            f"[blue]Dedup: {duplicates} of {checked} generated rows were duplicates ({duplicates / checked:.1%}; "
+            f"exact: {sum(self.duplicates['exact'].values())}, near: {sum(self.duplicates['near'].values())}). "
+            f"{sum(self.regenerated.values())} regenerated, {sum(self.dropped.values())} dropped.[/blue]"
+        )
+        rates = []
+        for cell, count in self.checked.items():
+            cell_duplicates = self.duplicates["exact"][cell] + self.duplicates["near"][cell]
+            if cell_duplicates:
+                rates.append((cell_duplicates / count, cell))
+        for rate, (label, category, type_name) in sorted(rates, reverse=True)[:top]:
+            console.print(f"[blue]  {label} / {category} / {type_name}: {rate:.1%} duplicates, {self.dropped[(label, category, type_name)]} dropped[/blue]")
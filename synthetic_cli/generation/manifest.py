@@ -0,0 +1,99 @@
+"""
+Run manifests that make generation resumable.
+
+A manifest sits next to the output file and records what is needed to
+continue an interrupted run exactly where it stopped: a hash of the
+configuration that produced it, the run's RNG seed, and which batches have
+been fully written (plus the sink's checkpoint at that point, the output
+size for text formats, so a half-written batch can be truncated away).
+It also carries the dataset statistics of the written batches and the
+matching size of the row index (see synthetic_cli.generation.datastats),
+and the adaptive token budget learned so far (see
+synthetic_cli.generation.budget).
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+from synthetic_cli.config.models import GenerationConfig
+
+# Fields that do not influence the generated rows, so changing them must not
+# invalidate a resume. The seed is recorded in the manifest separately.
+_UNHASHED_FIELDS = {
+    "model_config": {
+        "hf_token", "api_key", "offline", "max_concurrency", "request_timeout",
+        "low_cpu_mem_usage", "use_safetensors", "num_threads", "num_interop_threads",
+    },
+    "output_config": {"output_dir", "seed", "max_pending_batches"},
+    "verify_config": {"batch_size"},
+}
+
+def config_hash(config: GenerationConfig) -> str:
+    """Returns a stable hash of the output-affecting parts of a configuration."""
+    data = asdict(config)
+    data.pop("cache_config", None)
+    for section, names in _UNHASHED_FIELDS.items():
+        for name in names:
+            data[section].pop(name, None)
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+@dataclass
+class RunManifest:
+    """Progress record for one generation output file."""
+    output_path: str
+    config_hash: str
+    seed: int
+    num_batches: int
+    completed_batches: List[int] = field(default_factory=list)
+    output_bytes: int = 0
+    index_bytes: int = 0
+    stats: Dict[str, Any] = field(default_factory=dict)
+    token_budget: Dict[str, Any] = field(default_factory=dict)
+
+    @staticmethod
+    def path_for(output_path: str) -> str:
+        """Returns the manifest path that belongs to an output file."""
+        return f"{output_path}.manifest.json"
+
+    @classmethod
+    def load(cls, output_path: str) -> "RunManifest":
+        """Reads the manifest of an existing output file."""
+        manifest_path = cls.path_for(output_path)
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"No run manifest found at {manifest_path}.")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self):
+        """Atomically writes the manifest so a crash never leaves it half-written."""
+        manifest_path = self.path_for(self.output_path)
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, manifest_path)
+
+    def mark_completed(
+        self,
+        batch_num: int,
+        output_bytes: int,
+        index_bytes: int = 0,
+        stats: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[Dict[str, Any]] = None,
+    ):
+        """Records a fully written batch and persists the manifest."""
+        self.completed_batches.append(batch_num)
+        self.output_bytes = output_bytes
+        self.index_bytes = index_bytes
+        self.stats = stats or {}
+        self.token_budget = token_budget or {}
+        self.save()
+
+    def is_complete(self) -> bool:
+        """Returns True once every batch of the run has been written."""
+        return len(set(self.completed_batches)) == self.num_batches
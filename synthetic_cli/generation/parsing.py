@@ -0,0 +1,143 @@
+"""
+Parsers that turn raw completions into (text, reasoning) pairs.
+
+Two output modes are supported:
+
+* `text` (default): the model answers with `OUTPUT:` and `REASONING:`
+  markers. All markers are found in a single scan with one precompiled
+  pattern; answers that needed a fallback (lowercase markers, missing
+  reasoning, no markers at all) are still used but reported by kind.
+* `json`: the prompt asks for a `{"output": ..., "reasoning": ...}` object
+  and the first JSON object in the completion is decoded. Because the
+  answer is complete as soon as that object closes, backends can stop
+  generating there (see `JsonObjectScanner`) instead of running to
+  `max_new_tokens`.
+
+Parsers never print; they return the kind of fallback they had to use and
+the caller aggregates those into counters.
+"""
+
+import json
+import re
+from typing import Dict, Optional, Tuple, Type
+
+OUTPUT_MODES = ("text", "json")
+
+# (text, reasoning, fallback kind or None)
+ParseResult = Tuple[str, str, Optional[str]]
+
+_MARKER = re.compile(r"(OUTPUT|REASONING):", re.IGNORECASE)
+
+class OutputParser:
+    """Base class for completion parsers."""
+
+    def parse(self, text: str) -> ParseResult:
+        raise NotImplementedError
+
+class TextOutputParser(OutputParser):
+    """Parses `OUTPUT: ... REASONING: ...` answers."""
+
+    def parse(self, text: str) -> ParseResult:
+        markers = [(match.group(1), match.start(), match.end()) for match in _MARKER.finditer(text)]
+
+        # Prefer an exact-case pair, then any-case pair, then OUTPUT alone.
+        for exact, fallback in ((True, None), (False, "lowercase")):
+            pair = self._find_pair(text, markers, exact)
+            if pair is not None:
+                return pair[0], pair[1], fallback
+
+        for name, _, end in markers:
+            if name == "OUTPUT" and end < len(text):
+                return text[end:].strip(), "No reasoning provided", "no_reasoning"
+
+        return text.strip(), "Format not recognized", "unrecognized"
+
+    @staticmethod
+    def _find_pair(text: str, markers, exact: bool) -> Optional[Tuple[str, str]]:
+        """Returns the text between the first OUTPUT marker and the next REASONING marker."""
+        def is_marker(name: str, expected: str) -> bool:
+            return name == expected if exact else name.upper() == expected
+
+        for index, (name, _, output_end) in enumerate(markers):
+            if not is_marker(name, "OUTPUT"):
+                continue
+            for other, reasoning_start, reasoning_end in markers[index + 1:]:
+                if is_marker(other, "REASONING") and reasoning_start > output_end and reasoning_end < len(text):
+                    return text[output_end:reasoning_start].strip(), text[reasoning_end:].strip()
+            return None
+        return None
+
+class JsonOutputParser(OutputParser):
+    """Parses the first `{"output": ..., "reasoning": ...}` object in a completion."""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._fallback = TextOutputParser()
+
+    def parse(self, text: str) -> ParseResult:
+        start = text.find("{")
+        while start != -1:
+            try:
+                value, _ = self._decoder.raw_decode(text, start)
+            except ValueError:
+                start = text.find("{", start + 1)
+                continue
+            if isinstance(value, dict):
+                fields = {str(key).lower(): item for key, item in value.items()}
+                if "output" in fields:
+                    output = str(fields["output"]).strip()
+                    if "reasoning" in fields:
+                        return output, str(fields["reasoning"]).strip(), None
+                    return output, "No reasoning provided", "no_reasoning"
+            start = text.find("{", start + 1)
+
+        # The model ignored the JSON instruction; salvage what the text parser can.
+        output, reasoning, _ = self._fallback.parse(text)
+        return output, reasoning, "invalid_json"
+
+class JsonObjectScanner:
+    """
+    Tracks text as it is generated and reports when the first JSON object closes.
+
+    Feed it each new piece of a completion; it follows strings and escapes
+    so braces inside values do not count.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.closed = False
+
+    def feed(self, piece: str) -> bool:
+        """Consumes more text and returns whether the object is complete."""
+        for char in piece:
+            if self.closed:
+                break
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"' and self.depth:
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+            elif char == "}" and self.depth:
+                self.depth -= 1
+                self.closed = self.depth == 0
+        return self.closed
+
+PARSERS: Dict[str, Type[OutputParser]] = {
+    "text": TextOutputParser,
+    "json": JsonOutputParser,
+}
+
+def create_parser(output_mode: str) -> OutputParser:
+    """Instantiates the parser for an output mode."""
+    try:
+        return PARSERS[output_mode]()
+    except KeyError:
+        raise ValueError(f"Unknown output mode '{output_mode}'. Choose from: {', '.join(OUTPUT_MODES)}.")
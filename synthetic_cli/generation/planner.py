@@ -0,0 +1,159 @@
+"""
+Stratified, deterministic planning of the (label, category, type) of every sample.
+
+Drawing each sample's label, category and type independently lets the class
+counts drift from run to run. `SamplePlanner` instead fixes exact quotas up
+front and then decides which samples fall in which batch:
+
+* Quotas: the sample size is split across labels by `label_weights`, each
+  label's share across categories by `category_weights`, and each
+  category's share evenly across its types. Every split uses largest
+  remainders, so the counts add up exactly; ties are broken by the seed.
+* Order: the samples of each (label, category, type) cell are spread
+  evenly over the run (the k-th of q samples sits at position
+  (2k + 1) / 2q, which is the Sainte-Laguë order). Any prefix of the run is
+  therefore as balanced as it can be, and a batch contains the same mix as
+  the run as a whole.
+* Batches: the cell counts before any position are computed in closed form,
+  so any batch can be planned on its own, e.g. by a resumed or sharded
+  run, without materializing the samples before it. Rows are shuffled
+  within each batch with a seed derived from the run seed and batch index.
+
+`grouped_order` sorts a batch so identical prompts are adjacent, letting a
+backend batch them together without padding.
+"""
+
+import random
+from fractions import Fraction
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from synthetic_cli.config.models import UseCaseConfig
+
+Sample = Tuple[str, str, str]
+
+def _weights(names: Sequence[str], weights: Dict[str, float], kind: str) -> List[float]:
+    """Returns the weight of every name (1.0 unless configured), validating the mapping."""
+    unknown = set(weights) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown {kind}(s) in {kind}_weights: {', '.join(sorted(unknown))}")
+    values = [float(weights.get(name, 1.0)) for name in names]
+    if any(value < 0 for value in values):
+        raise ValueError(f"{kind.capitalize()} weights must not be negative.")
+    if not any(values):
+        raise ValueError(f"At least one {kind} needs a positive weight.")
+    return values
+
+def apportion(total: int, weights: Sequence[float], rng: random.Random) -> List[int]:
+    """Splits `total` into integer shares proportional to `weights` by largest remainders."""
+    weight_sum = sum(weights)
+    exact = [total * weight / weight_sum for weight in weights]
+    shares = [int(value) for value in exact]
+    # Seeded tie-breaking so equal remainders do not always favour the first entries.
+    priority = list(range(len(weights)))
+    rng.shuffle(priority)
+    by_remainder = sorted(
+        (index for index, weight in enumerate(weights) if weight > 0),
+        key=lambda index: (shares[index] - exact[index], priority[index]),
+    )
+    for index in by_remainder[:total - sum(shares)]:
+        shares[index] += 1
+    return shares
+
+class SamplePlanner:
+    """Assigns a (label, category, type) to every sample position of a run."""
+
+    def __init__(self, use_case_config: UseCaseConfig, sample_size: int, batch_size: int, seed: int):
+        self.sample_size = sample_size
+        self.batch_size = batch_size
+        self.seed = seed
+        rng = random.Random(f"{seed}:plan")
+
+        labels = list(use_case_config.labels)
+        categories = list(use_case_config.categories_types)
+        for category in categories:
+            if not use_case_config.categories_types[category]:
+                raise ValueError(f"Category '{category}' has no types.")
+        label_weights = _weights(labels, use_case_config.label_weights, "label")
+        category_weights = _weights(categories, use_case_config.category_weights, "category")
+
+        self.cells: List[Sample] = []
+        self.quotas: List[int] = []
+        for label, label_quota in zip(labels, apportion(sample_size, label_weights, rng)):
+            for category, category_quota in zip(categories, apportion(label_quota, category_weights, rng)):
+                types = use_case_config.categories_types[category]
+                for type_name, quota in zip(types, apportion(category_quota, [1.0] * len(types), rng)):
+                    if quota:
+                        self.cells.append((label, category, type_name))
+                        self.quotas.append(quota)
+
+        # Breaks ties between cells whose samples fall on the same position.
+        self._rank = list(range(len(self.cells)))
+        rng.shuffle(self._rank)
+        # Finer than the smallest gap between two distinct positions.
+        self._resolution = 2 * sample_size * sample_size + 1
+
+    def label_counts(self) -> Dict[str, int]:
+        """Returns how many samples of each label the run will contain."""
+        counts: Dict[str, int] = {}
+        for (label, _, _), quota in zip(self.cells, self.quotas):
+            counts[label] = counts.get(label, 0) + quota
+        return counts
+
+    def num_batches(self) -> int:
+        return (self.sample_size + self.batch_size - 1) // self.batch_size
+
+    def _counts_below(self, step: int) -> List[int]:
+        """Per cell, how many of its samples sit strictly before position step / resolution."""
+        resolution = self._resolution
+        counts = []
+        for quota in self.quotas:
+            # Samples k with (2k + 1) / 2q < step / resolution.
+            below = -((resolution - 2 * quota * step) // (2 * resolution))
+            counts.append(min(quota, max(0, below)))
+        return counts
+
+    def _prefix_counts(self, index: int) -> List[int]:
+        """Per cell, how many of the first `index` samples of the run belong to it."""
+        if index >= self.sample_size:
+            return list(self.quotas)
+        low, high = 0, self._resolution
+        while low < high:
+            middle = (low + high + 1) // 2
+            if sum(self._counts_below(middle)) <= index:
+                low = middle
+            else:
+                high = middle - 1
+        counts = self._counts_below(low)
+        # The cells with a sample on the next position fill the remainder in tie order.
+        tied = [cell for cell, (before, after) in enumerate(zip(counts, self._counts_below(low + 1))) if after > before]
+        for cell in sorted(tied, key=self._rank.__getitem__)[:index - sum(counts)]:
+            counts[cell] += 1
+        return counts
+
+    def plan(self, start: int, end: int) -> List[Sample]:
+        """Returns the samples at positions [start, end), in run order."""
+        positions = []
+        for cell, (first, last) in enumerate(zip(self._prefix_counts(start), self._prefix_counts(end))):
+            quota = self.quotas[cell]
+            positions.extend((Fraction(2 * k + 1, 2 * quota), self._rank[cell], cell) for k in range(first, last))
+        positions.sort()
+        return [self.cells[cell] for _, _, cell in positions]
+
+    def batch(self, batch_num: int) -> List[Sample]:
+        """Returns the shuffled samples of one batch."""
+        start = batch_num * self.batch_size
+        samples = self.plan(start, min(start + self.batch_size, self.sample_size))
+        random.Random(f"{self.seed}:{batch_num}").shuffle(samples)
+        return samples
+
+    def __iter__(self) -> Iterator[List[Sample]]:
+        """Lazily yields every batch of the run."""
+        for batch_num in range(self.num_batches()):
+            yield self.batch(batch_num)
+
+def grouped_order(samples: Sequence[Sample]) -> List[int]:
+    """Returns sample positions reordered so identical samples are adjacent, in order of first appearance."""
+    groups: Dict[Sample, List[int]] = {}
+    for position, sample in enumerate(samples):
+        groups.setdefault(sample, []).append(position)
+    return [position for positions in groups.values() for position in positions]
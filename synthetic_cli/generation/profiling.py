@@ -0,0 +1,127 @@
+"""
+Opt-in per-stage timing for generation runs.
+
+`StageProfiler.stage(name)` wraps one step of the hot path (login,
+tokenizer load, prompt building, the model call, parsing, writing, ...)
+and accumulates its wall time and call count. Stages nest: the model
+call includes chat templating and generation, and backend loading
+includes login, tokenizer load and pipeline construction. Disabled
+profilers cost a context-manager entry per stage and record nothing.
+
+A profiler can also capture a full trace of the run: `cprofile` dumps a
+`<output>.prof` file for pstats/snakeviz, and `torch` records a
+`<output>.trace.json` Chrome trace in which every stage shows up as a
+labelled range. The per-stage summary is written to
+`<output>.profile.json`.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+TOOLS = ("cprofile", "torch")
+
+class StageProfiler:
+    """Accumulates wall time per named stage."""
+
+    def __init__(self, enabled: bool = False, tool: Optional[str] = None):
+        if tool is not None and tool not in TOOLS:
+            raise ValueError(f"Unknown profiler '{tool}'. Choose from: {', '.join(TOOLS)}.")
+        self.enabled = enabled or tool is not None
+        self.tool = tool
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._record_function = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the enclosed block as one call of stage `name`."""
+        if not self.enabled:
+            yield
+            return
+        label = self._record_function(name) if self._record_function else None
+        if label is not None:
+            label.__enter__()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if label is not None:
+                label.__exit__(None, None, None)
+            with self._lock:
+                totals = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                totals["calls"] += 1
+                totals["seconds"] += elapsed
+
+    @contextmanager
+    def capture(self, output_path: str):
+        """Records a cProfile or torch trace of the enclosed block, if requested."""
+        if self.tool == "cprofile":
+            import cProfile
+
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                profile.dump_stats(f"{output_path}.prof")
+        elif self.tool == "torch":
+            import torch
+
+            self._record_function = torch.profiler.record_function
+            with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU]) as trace:
+                try:
+                    yield
+                finally:
+                    self._record_function = None
+            trace.export_chrome_trace(f"{output_path}.trace.json")
+        else:
+            yield
+
+    def report(self, wall_seconds: float) -> Dict:
+        """Summarizes the stages, slowest first."""
+        stages = {
+            name: {
+                "calls": int(totals["calls"]),
+                "total_seconds": totals["seconds"],
+                "mean_ms": totals["seconds"] / totals["calls"] * 1000,
+                "share_of_wall": totals["seconds"] / wall_seconds if wall_seconds else 0.0,
+            }
+            for name, totals in sorted(self.stages.items(), key=lambda item: -item[1]["seconds"])
+        }
+        return {"wall_seconds": wall_seconds, "tool": self.tool, "stages": stages}
+
+    def write_report(self, output_path: str, wall_seconds: float) -> str:
+        """Writes the stage summary next to the output and prints it as a table."""
+        report = self.report(wall_seconds)
+        report_path = f"{output_path}.profile.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+        table = Table(title=f"Stage timings ({wall_seconds:.2f} s wall)")
+        table.add_column("Stage")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total (s)", justify="right")
+        table.add_column("Mean (ms)", justify="right")
+        table.add_column("% of wall", justify="right")
+        for name, stats in report["stages"].items():
+            table.add_row(
+                name,
+                str(stats["calls"]),
+                f"{stats['total_seconds']:.3f}",
+                f"{stats['mean_ms']:.2f}",
+                f"{stats['share_of_wall'] * 100:.1f}",
+            )
+        console.print(table)
+        console.print(f"[blue]Profile written to {report_path}[/blue]")
+        return report_path
@@ -0,0 +1,144 @@
+"""
+Structured progress events for generation runs.
+
+`DataGenerator` reports what it is doing through a `ProgressTracker`,
+which turns raw counts into `ProgressEvent`s (samples done, rows dropped,
+tokens generated, throughput, ETA, parse failures, current batch) and hands them
+to a listener: the TUI renders them as a live progress bar, and headless
+runs can stream them as JSON lines with `JsonLinesReporter`.
+
+Events are emitted from the generation loop and from the writer thread, so
+listeners must be thread-safe (or, like the TUI, hop to their own thread).
+"""
+
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, Optional, TextIO
+
+@dataclass
+class ProgressEvent:
+    """A snapshot of a run's progress."""
+    kind: str
+    batch: Optional[int]
+    num_batches: int
+    samples_done: int
+    samples_total: int
+    tokens: int
+    tokens_per_second: float
+    elapsed_seconds: float
+    eta_seconds: Optional[float]
+    parse_failures: Dict[str, int] = field(default_factory=dict)
+    output_path: Optional[str] = None
+    rows_dropped: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+ProgressListener = Callable[[ProgressEvent], None]
+
+class ProgressTracker:
+    """
+    Accumulates progress counts and emits events to a listener.
+
+    Samples already on disk when the run starts (a resumed run) count as
+    done but not towards throughput, so the ETA reflects the current speed.
+    Progress counts planned samples, so rows dropped by deduplication or
+    label verification still complete their batch; they are counted
+    separately in `rows_dropped`.
+    """
+
+    def __init__(self, listener: Optional[ProgressListener], num_batches: int, parse_failures: Optional[Dict[str, int]] = None):
+        self.listener = listener
+        self.num_batches = num_batches
+        self.output_path = None
+        self.samples_total = 0
+        self.samples_done = 0
+        self.rows_dropped = 0
+        self.tokens = 0
+        # Shared with the parser, which counts failures by kind.
+        self.parse_failures = parse_failures if parse_failures is not None else {}
+        self._resumed_samples = 0
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def start(self, output_path: str, samples_total: int, samples_already_done: int = 0):
+        """Marks the start of generation into `output_path`."""
+        with self._lock:
+            self._start = time.perf_counter()
+            self.output_path = output_path
+            self.samples_total = samples_total
+            self.samples_done = self._resumed_samples = samples_already_done
+            self.rows_dropped = 0
+        self._emit("start", None)
+
+    def batch_started(self, batch_num: int):
+        self._emit("batch_started", batch_num)
+
+    def add_tokens(self, count: int):
+        with self._lock:
+            self.tokens += count
+
+    def batch_written(self, batch_num: int, num_samples: int, rows_kept: Optional[int] = None):
+        """Counts a written batch of `num_samples` planned samples, of which `rows_kept` made it to disk."""
+        with self._lock:
+            self.samples_done += num_samples
+            if rows_kept is not None:
+                self.rows_dropped += num_samples - rows_kept
+        self._emit("batch_written", batch_num)
+
+    def finish(self):
+        self._emit("done", None)
+
+    def _emit(self, kind: str, batch_num: Optional[int]):
+        if self.listener is None:
+            return
+        with self._lock:
+            elapsed = time.perf_counter() - self._start
+            fresh = self.samples_done - self._resumed_samples
+            remaining = self.samples_total - self.samples_done
+            if remaining <= 0:
+                eta = 0.0
+            elif fresh and elapsed:
+                eta = remaining * elapsed / fresh
+            else:
+                eta = None
+            event = ProgressEvent(
+                kind=kind,
+                batch=batch_num,
+                num_batches=self.num_batches,
+                samples_done=self.samples_done,
+                samples_total=self.samples_total,
+                tokens=self.tokens,
+                tokens_per_second=self.tokens / elapsed if elapsed else 0.0,
+                elapsed_seconds=elapsed,
+                eta_seconds=eta,
+                parse_failures=dict(self.parse_failures),
+                output_path=self.output_path,
+                rows_dropped=self.rows_dropped,
+            )
+        self.listener(event)
+
+class JsonLinesReporter:
+    """A progress listener that writes every event as one JSON line."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str) -> "JsonLinesReporter":
+        """Reports to a file, or to stderr for '-' so events stay apart from the console output."""
+        return cls(sys.stderr if path == "-" else open(path, "a", encoding="utf-8"))
+
+    def __call__(self, event: ProgressEvent):
+        line = json.dumps(event.to_dict(), separators=(",", ":"))
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def close(self):
+        if self.stream is not sys.stderr:
+            self.stream.close()
@@ -0,0 +1,114 @@
+"""
+A compact, columnar buffer for the rows of one output batch.
+
+Building every row as a dict repeats the column names and the model name
+per row and costs a dict per row on top of the strings themselves.
+`RowBatch` keeps one list per column instead: labels are interned so rows
+share a single string per label, the model name is stored once per batch,
+and the reasoning and confidence columns only exist when they are
+saved. For the run's statistics, each row's category and type are kept,
+interned, but not written, and the batch counts its parsed completions
+and parse failures. Sinks read the columns directly, so no per-row dicts
+are built on the way to disk.
+"""
+
+import sys
+from collections import Counter
+from itertools import repeat
+from typing import Iterable, List, Optional, Sequence
+
+class RowBatch:
+    """The rows of one batch, stored column by column."""
+
+    __slots__ = (
+        "model", "texts", "labels", "categories", "types", "reasonings", "confidences",
+        "completions", "parse_failures",
+    )
+
+    def __init__(self, model: str, save_reasoning: bool = True, save_confidence: bool = False):
+        self.model = sys.intern(model)
+        self.texts: List[str] = []
+        self.labels: List[str] = []
+        self.categories: List[str] = []
+        self.types: List[str] = []
+        self.reasonings: Optional[List[str]] = [] if save_reasoning else None
+        self.confidences: Optional[List[float]] = [] if save_confidence else None
+        # Every completion parsed for the batch, including regenerated ones.
+        self.completions = 0
+        self.parse_failures: Counter = Counter()
+
+    def append(
+        self,
+        text: str,
+        label: str,
+        reasoning: Optional[str] = None,
+        confidence: Optional[float] = None,
+        category: str = "",
+        type_name: str = "",
+    ):
+        self.texts.append(text)
+        self.labels.append(sys.intern(label))
+        self.categories.append(sys.intern(category))
+        self.types.append(sys.intern(type_name))
+        if self.reasonings is not None:
+            self.reasonings.append(reasoning)
+        if self.confidences is not None:
+            self.confidences.append(confidence)
+
+    def record_parses(self, fallbacks: Iterable[Optional[str]]):
+        """Counts parsed completions and how each failed to follow the format, if it did."""
+        for fallback in fallbacks:
+            self.completions += 1
+            if fallback is not None:
+                self.parse_failures[fallback] += 1
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def column(self, name: str) -> Sequence:
+        """Returns one column's values; missing columns are empty strings."""
+        if name == "text":
+            return self.texts
+        if name == "label":
+            return self.labels
+        if name == "model":
+            return RepeatedValue(self.model, len(self))
+        if name == "reasoning" and self.reasonings is not None:
+            return self.reasonings
+        if name == "confidence" and self.confidences is not None:
+            return self.confidences
+        return RepeatedValue("", len(self))
+
+    def nbytes(self) -> int:
+        """Returns the memory held by the buffer, counting each shared string once."""
+        seen = set()
+        total = sys.getsizeof(self)
+        for values in (self.texts, self.labels, self.categories, self.types, self.reasonings or [], self.confidences or []):
+            total += sys.getsizeof(values)
+            for value in values:
+                if id(value) not in seen:
+                    seen.add(id(value))
+                    total += sys.getsizeof(value)
+        return total + sys.getsizeof(self.model)
+
+class RepeatedValue(Sequence[str]):
+    """A read-only column holding the same value in every row."""
+
+    __slots__ = ("value", "length")
+
+    def __init__(self, value: str, length: int):
+        self.value = value
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.value] * len(range(*index.indices(self.length)))
+        if not -self.length <= index < self.length:
+            raise IndexError(index)
+        return self.value
+
+    def __iter__(self):
+        return repeat(self.value, self.length)
@@ -0,0 +1,129 @@
+"""
+A bounded producer/consumer pipeline for generation runs.
+
+Three stages run concurrently on one event loop:
+
+* the planner lazily yields batch jobs, in output order;
+* a pool of generation tasks turns jobs into rows, several at a time if
+  the backend can serve them in parallel;
+* a single writer stage writes finished batches strictly in output order,
+  on its own thread so fsyncs never stall generation.
+
+A semaphore caps the number of batches that are planned but not yet
+written, so memory stays flat however large the run is: once the writer
+falls behind or a batch is slow, planning simply pauses.
+
+Steps of generation that must still see batches in output order, e.g.
+checking rows against the duplicate index of the earlier rows, take turns
+through `OrderedTurns`.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+@dataclass
+class BatchJob:
+    """One output batch to generate: its index and the (label, category, type) of each row."""
+    batch_num: int
+    samples: List[Tuple[str, str, str]]
+    sample_indices: List[int]
+    # Adaptive token budget state once the batch is generated, checkpointed with it.
+    token_budget: Optional[Dict[str, Any]] = None
+
+class OrderedTurns:
+    """Lets concurrently generated batches run one step each, in output order."""
+
+    def __init__(self, batch_nums: Iterable[int]):
+        batch_nums = list(batch_nums)
+        self._previous: Dict[int, int] = dict(zip(batch_nums[1:], batch_nums))
+        self._done: Dict[int, asyncio.Event] = {}
+
+    def _event(self, batch_num: int) -> asyncio.Event:
+        if batch_num not in self._done:
+            self._done[batch_num] = asyncio.Event()
+        return self._done[batch_num]
+
+    async def wait(self, batch_num: int):
+        """Waits until the batch before `batch_num` has finished its turn."""
+        previous = self._previous.pop(batch_num, None)
+        if previous is not None:
+            await self._event(previous).wait()
+            del self._done[previous]
+
+    def finish(self, batch_num: int):
+        """Ends the turn of `batch_num`, letting the next batch take its own."""
+        self._event(batch_num).set()
+
+GenerateFn = Callable[[BatchJob], Awaitable[Any]]
+WriteFn = Callable[[BatchJob, Any], None]
+
+async def run_scheduled(
+    jobs: Iterable[BatchJob],
+    generate: GenerateFn,
+    write: WriteFn,
+    concurrency: int = 1,
+    max_pending: int = 4,
+):
+    """
+    Generates `jobs` with up to `concurrency` batches in flight and writes them in order.
+
+    `write` is called from a dedicated thread, once per job, in the order
+    the jobs were produced. The first exception raised by any stage cancels
+    the others and is re-raised.
+    """
+    concurrency = max(1, concurrency)
+    max_pending = max(concurrency, max_pending)
+    pending = asyncio.Semaphore(max_pending)
+    work: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    done: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    async def produce():
+        sequence = 0
+        for job in jobs:
+            await pending.acquire()
+            await work.put((sequence, job))
+            sequence += 1
+        for _ in range(concurrency):
+            await work.put(None)
+        await done.put((sequence, None, None))
+
+    async def generate_worker():
+        while True:
+            item = await work.get()
+            if item is None:
+                return
+            sequence, job = item
+            await done.put((sequence, job, await generate(job)))
+
+    async def write_in_order(executor: ThreadPoolExecutor):
+        ready: Dict[int, Tuple[BatchJob, Any]] = {}
+        next_sequence = 0
+        total = None
+        while total is None or next_sequence < total:
+            sequence, job, result = await done.get()
+            if job is None:
+                total = sequence
+                continue
+            ready[sequence] = (job, result)
+            while next_sequence in ready:
+                job, result = ready.pop(next_sequence)
+                await loop.run_in_executor(executor, write, job, result)
+                next_sequence += 1
+                pending.release()
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="synthetic-cli-writer") as executor:
+        tasks = [asyncio.ensure_future(produce()), asyncio.ensure_future(write_in_order(executor))]
+        tasks += [asyncio.ensure_future(generate_worker()) for _ in range(concurrency)]
+        try:
+            # Wait until every stage finishes or one of them fails.
+            finished, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in finished:
+                task.result()
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,426 @@
+"""
+Output sinks that stream generated rows to disk.
+
+Each sink writes one batch at a time straight from the columns of a
+`RowBatch`, without building a dict per row, and makes the batch durable
+(flush + fsync) before returning, so the run manifest never records a
+batch that is not safely on disk. Compressed CSV and JSONL outputs write
+every batch as its own gzip member, which keeps the file valid at every
+batch boundary and lets a resumed run truncate back to the last completed
+batch.
+
+Every sink also reports where each row of the last batch landed, as a
+(chunk, row) position: the byte offset of the row itself for plain text,
+the byte offset of its gzip member and its index within the member for
+compressed text, and its row group and index within the group for
+Parquet. `read_positions` reads rows straight back from such positions,
+which is what the per-label row index (see
+synthetic_cli.generation.datastats) is built on.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+from json.encoder import encode_basestring
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+from synthetic_cli.generation.rows import RowBatch
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+# Columns holding numbers rather than text.
+NUMERIC_COLUMNS = ("confidence",)
+
+# Where a row is stored: (chunk, row within the chunk).
+Position = Tuple[int, int]
+
+def _require_pyarrow():
+    """Imports pyarrow, which is only needed for Parquet output."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ValueError("Parquet output requires pyarrow. Install it with `pip install synthetic-cli[parquet]`.") from e
+    return pyarrow
+
+class OutputSink:
+    """Base class for a batch-at-a-time output writer."""
+
+    extension = ""
+
+    def __init__(self, path: str, columns: Sequence[str], compression: Optional[str] = None):
+        self.path = path
+        self.columns = list(columns)
+        self.compression = compression
+        # Positions of the rows of the last batch written.
+        self.row_positions: List[Position] = []
+
+    def open(self, resume_bytes: Optional[int] = None):
+        """
+        Opens the sink, either fresh or truncated to a previous checkpoint.
+
+        A fresh sink refuses to write into a file that already has content;
+        only a resumed run, which owns the file, truncates it.
+        """
+        raise NotImplementedError
+
+    def write_batch(self, batch_num: int, batch: RowBatch) -> int:
+        """Durably writes a batch and returns the checkpoint to record for it."""
+        raise NotImplementedError
+
+    def close(self):
+        """Finalizes the output file."""
+        raise NotImplementedError
+
+    def abort(self):
+        """Releases the sink after a failure, leaving completed batches resumable."""
+        self.close()
+
+    def read_rows(self, batch_nums: Iterable[int]) -> Iterator[Dict[str, str]]:
+        """Yields the rows of batches already written, once the sink is open for resuming."""
+        raise NotImplementedError
+
+    @classmethod
+    def concat(cls, shard_paths: List[str], output_path: str, compression: Optional[str] = None) -> List[int]:
+        """Merges finished shard outputs, in order, into a single file; returns where each shard starts."""
+        raise NotImplementedError
+
+    @classmethod
+    def shift_positions(cls, start: int, positions: Iterable[Position], compression: Optional[str] = None) -> Iterator[Position]:
+        """Maps a shard's row positions into the file `concat` built, given the shard's start."""
+        return ((start + chunk, row) for chunk, row in positions)
+
+    @classmethod
+    def read_positions(cls, path: str, positions: Iterable[Position], compression: Optional[str] = None) -> Iterator[Dict]:
+        """Yields the rows stored at the given positions, which must be in file order."""
+        raise NotImplementedError
+
+class _TextSink(OutputSink):
+    """Shared logic for line-oriented text formats with optional gzip."""
+
+    def __init__(self, path: str, columns: Sequence[str], compression: Optional[str] = None):
+        if compression not in (None, "gzip"):
+            raise ValueError(f"Unsupported compression '{compression}' for {self.extension} output. Use gzip.")
+        super().__init__(path, columns, compression)
+        self._file = None
+
+    def open(self, resume_bytes: Optional[int] = None):
+        if resume_bytes is None and os.path.exists(self.path) and os.path.getsize(self.path):
+            raise ValueError(f"{self.path} already exists and is not empty; refusing to overwrite it.")
+        self._file = open(self.path, "ab")
+        self._file.truncate(resume_bytes or 0)
+        self._file.seek(0, os.SEEK_END)
+
+    def _header(self) -> str:
+        return ""
+
+    def _encode_rows(self, batch: RowBatch) -> List[str]:
+        """Returns the encoded line(s) of every row."""
+        raise NotImplementedError
+
+    def write_batch(self, batch_num: int, batch: RowBatch) -> int:
+        start = self._file.tell()
+        header = self._header().encode("utf-8") if start == 0 else b""
+        rows = [row.encode("utf-8") for row in self._encode_rows(batch)]
+        payload = header + b"".join(rows)
+        if self.compression == "gzip":
+            payload = gzip.compress(payload)
+            self.row_positions = [(start, row) for row in range(len(rows))]
+        else:
+            self.row_positions = []
+            offset = start + len(header)
+            for row in rows:
+                self.row_positions.append((offset, 0))
+                offset += len(row)
+        self._file.write(payload)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read_rows(self, batch_nums: Iterable[int]) -> Iterator[Dict[str, str]]:
+        # The file was truncated to the last completed batch on open.
+        with io.TextIOWrapper(self._open_read(self.path, self.compression), encoding="utf-8", newline="") as stream:
+            yield from self._decode(stream)
+
+    def _decode(self, stream) -> Iterator[Dict[str, str]]:
+        raise NotImplementedError
+
+    @classmethod
+    def _decode_rows(cls, lines: Iterator[str], columns: Optional[List[str]]) -> Iterator[Dict]:
+        """Decodes rows from lines that start at a row boundary."""
+        raise NotImplementedError
+
+    @classmethod
+    def _open_read(cls, path: str, compression: Optional[str]):
+        return gzip.open(path, "rb") if compression == "gzip" else open(path, "rb")
+
+    @classmethod
+    def _skip_header(cls, stream) -> int:
+        """Advances past a shard's header, if the format has one, and returns its length."""
+        return 0
+
+    @classmethod
+    def _read_header(cls, lines: Iterator[str]) -> Optional[List[str]]:
+        """Reads the column names at the start of a file, if the format has a header."""
+        return None
+
+    @classmethod
+    def concat(cls, shard_paths: List[str], output_path: str, compression: Optional[str] = None) -> List[int]:
+        starts = []
+        with open(output_path, "wb") as out:
+            for position, shard_path in enumerate(shard_paths):
+                with cls._open_read(shard_path, compression) as src:
+                    header = cls._skip_header(src) if position > 0 else 0
+                    # A compressed shard becomes a single member; plain shards are copied without their header.
+                    starts.append(out.tell() if compression == "gzip" else out.tell() - header)
+                    if compression == "gzip":
+                        with gzip.GzipFile(fileobj=out, mode="wb") as dst:
+                            shutil.copyfileobj(src, dst)
+                    else:
+                        shutil.copyfileobj(src, out)
+        return starts
+
+    @classmethod
+    def shift_positions(cls, start: int, positions: Iterable[Position], compression: Optional[str] = None) -> Iterator[Position]:
+        if compression == "gzip":
+            # Rows are numbered across the whole shard, now one member.
+            return ((start, row) for row, _ in enumerate(positions))
+        return super().shift_positions(start, positions, compression)
+
+    @classmethod
+    def read_positions(cls, path: str, positions: Iterable[Position], compression: Optional[str] = None) -> Iterator[Dict]:
+        with cls._open_read(path, compression) as start:
+            columns = cls._read_header(line.decode("utf-8") for line in start)
+        with open(path, "rb") as f:
+            for chunk, group in groupby(positions, key=lambda position: position[0]):
+                f.seek(chunk)
+                if compression != "gzip":
+                    # Plain rows are located by their own offset.
+                    yield next(cls._decode_rows((line.decode("utf-8") for line in f), columns))
+                    continue
+                wanted = [row for _, row in group]
+                lines = (line.decode("utf-8") for line in gzip.GzipFile(fileobj=f, mode="rb"))
+                if chunk == 0:
+                    cls._read_header(lines)
+                rows = cls._decode_rows(lines, columns)
+                current, row = -1, None
+                for index in wanted:
+                    while current < index:
+                        row = next(rows)
+                        current += 1
+                    yield row
+
+class CsvSink(_TextSink):
+    """Writes rows as CSV with a single header line."""
+
+    extension = ".csv"
+
+    def _header(self) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(self.columns)
+        return buffer.getvalue()
+
+    def _encode_rows(self, batch: RowBatch) -> List[str]:
+        # The writer writes each row with a single call, so every row is one entry.
+        rows: List[str] = []
+        writer = csv.writer(_LineCollector(rows), lineterminator="\n")
+        writer.writerows(zip(*(batch.column(column) for column in self.columns)))
+        return rows
+
+    def _decode(self, stream) -> Iterator[Dict[str, str]]:
+        return csv.DictReader(stream)
+
+    @classmethod
+    def _decode_rows(cls, lines: Iterator[str], columns: Optional[List[str]]) -> Iterator[Dict]:
+        return csv.DictReader(lines, fieldnames=columns)
+
+    @classmethod
+    def _skip_header(cls, stream) -> int:
+        return len(stream.readline())
+
+    @classmethod
+    def _read_header(cls, lines: Iterator[str]) -> Optional[List[str]]:
+        return next(csv.reader(lines), [])
+
+class _LineCollector:
+    """A write-only file that keeps each write as a separate string."""
+
+    __slots__ = ("write",)
+
+    def __init__(self, lines: List[str]):
+        self.write = lines.append
+
+def _encode_json(value) -> str:
+    return encode_basestring(value) if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+def _cached(encode):
+    """Memoizes an encoder for columns with few distinct values."""
+    encoded: Dict[str, str] = {}
+
+    def cached(value) -> str:
+        if value not in encoded:
+            encoded[value] = encode(value)
+        return encoded[value]
+    return cached
+
+class JsonlSink(_TextSink):
+    """Writes one JSON object per row."""
+
+    extension = ".jsonl"
+
+    def _encode_rows(self, batch: RowBatch) -> List[str]:
+        # Same output as json.dumps(row, ensure_ascii=False). Labels and the
+        # model name repeat on every row, so each distinct value is encoded once.
+        keys = [encode_basestring(column) + ": " for column in self.columns]
+        encoders = [_cached(_encode_json) if column in ("label", "model") else _encode_json for column in self.columns]
+        return [
+            "{" + ", ".join(key + encode(value) for key, encode, value in zip(keys, encoders, values)) + "}\n"
+            for values in zip(*(batch.column(column) for column in self.columns))
+        ]
+
+    def _decode(self, stream) -> Iterator[Dict[str, str]]:
+        return self._decode_rows(stream, None)
+
+    @classmethod
+    def _decode_rows(cls, lines: Iterator[str], columns: Optional[List[str]]) -> Iterator[Dict]:
+        return (json.loads(line) for line in lines if line.strip())
+
+class ParquetSink(OutputSink):
+    """
+    Writes Parquet with one row group per batch.
+
+    A Parquet file is only readable once its footer is written, so each
+    batch is first staged as a fsynced part file in `<output>.parts/` and
+    the parts are stitched into the final file, as row groups, on close.
+    A resumed run simply keeps the parts of the batches already done.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, path: str, columns: Sequence[str], compression: Optional[str] = None):
+        _require_pyarrow()
+        super().__init__(path, columns, compression or "snappy")
+        self.parts_dir = f"{path}.parts"
+        self._bytes = 0
+        self._row_groups = 0
+
+    def _schema(self):
+        pa = _require_pyarrow()
+        return pa.schema([(column, pa.float64() if column in NUMERIC_COLUMNS else pa.string()) for column in self.columns])
+
+    def open(self, resume_bytes: Optional[int] = None):
+        if resume_bytes is None and os.path.exists(self.path) and os.path.getsize(self.path):
+            raise ValueError(f"{self.path} already exists and is not empty; refusing to overwrite it.")
+        if resume_bytes is None and os.path.isdir(self.parts_dir):
+            shutil.rmtree(self.parts_dir)
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self._bytes = resume_bytes or 0
+        self._row_groups = 0
+
+    def write_batch(self, batch_num: int, batch: RowBatch) -> int:
+        pa = _require_pyarrow()
+        table = pa.Table.from_pydict(
+            {column: list(batch.column(column)) for column in self.columns},
+            schema=self._schema(),
+        )
+        part_name = f"part-{batch_num:08d}.parquet"
+        part_path = os.path.join(self.parts_dir, part_name)
+        # Parts become row groups in batch order; stale parts of later batches do not count.
+        row_group = sum(1 for name in os.listdir(self.parts_dir) if name.endswith(".parquet") and name < part_name)
+        self.row_positions = [(row_group, row) for row in range(len(batch))]
+        pa.parquet.write_table(table, part_path, compression=self.compression)
+        with open(part_path, "rb") as f:
+            os.fsync(f.fileno())
+        self._bytes += os.path.getsize(part_path)
+        return self._bytes
+
+    def abort(self):
+        # Keep the staged parts; a resumed run finalizes them.
+        pass
+
+    def read_rows(self, batch_nums: Iterable[int]) -> Iterator[Dict[str, str]]:
+        pa = _require_pyarrow()
+        # Parts past the last completed batch may exist but are not part of the run yet.
+        for batch_num in sorted(batch_nums):
+            table = pa.parquet.read_table(os.path.join(self.parts_dir, f"part-{batch_num:08d}.parquet"))
+            yield from table.to_pylist()
+
+    def close(self):
+        if not os.path.isdir(self.parts_dir):
+            return
+        part_paths = sorted(
+            os.path.join(self.parts_dir, name) for name in os.listdir(self.parts_dir) if name.endswith(".parquet")
+        )
+        if part_paths:
+            self._write_row_groups(part_paths, self.path, self.compression, self._schema())
+        shutil.rmtree(self.parts_dir)
+
+    @staticmethod
+    def _write_row_groups(source_paths: List[str], output_path: str, compression: str, schema=None) -> List[int]:
+        """Copies every row group of the source files, in order, into one file; returns each file's first group."""
+        pa = _require_pyarrow()
+        tmp_path = f"{output_path}.tmp"
+        schema = schema or pa.parquet.read_schema(source_paths[0])
+        starts = []
+        row_groups = 0
+        with pa.parquet.ParquetWriter(tmp_path, schema, compression=compression) as writer:
+            for source_path in source_paths:
+                source = pa.parquet.ParquetFile(source_path)
+                starts.append(row_groups)
+                for index in range(source.num_row_groups):
+                    writer.write_table(source.read_row_group(index))
+                row_groups += source.num_row_groups
+        os.replace(tmp_path, output_path)
+        return starts
+
+    @classmethod
+    def concat(cls, shard_paths: List[str], output_path: str, compression: Optional[str] = None) -> List[int]:
+        return cls._write_row_groups(shard_paths, output_path, compression or "snappy")
+
+    @classmethod
+    def read_positions(cls, path: str, positions: Iterable[Position], compression: Optional[str] = None) -> Iterator[Dict]:
+        pa = _require_pyarrow()
+        source = pa.parquet.ParquetFile(path)
+        for row_group, group in groupby(positions, key=lambda position: position[0]):
+            rows = source.read_row_group(row_group).to_pylist()
+            for _, row in group:
+                yield rows[row]
+
+SINKS: Dict[str, Type[OutputSink]] = {
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+}
+
+def sink_class(output_format: str) -> Type[OutputSink]:
+    """Looks up the sink implementation for an output format."""
+    try:
+        return SINKS[output_format]
+    except KeyError:
+        raise ValueError(f"Unknown output format '{output_format}'. Choose from: {', '.join(FORMATS)}.")
+
+def output_format_of(path: str) -> Tuple[str, Optional[str]]:
+    """Recognizes the format and compression of an output file from its extension."""
+    compression = None
+    if path.endswith(".gz"):
+        path, compression = path[:-3], "gzip"
+    for output_format, sink in SINKS.items():
+        if path.endswith(sink.extension):
+            return output_format, compression
+    raise ValueError(f"Cannot tell the output format of {path}. Expected one of: {', '.join(FORMATS)}.")
+
+def output_extension(output_format: str, compression: Optional[str] = None) -> str:
+    """Returns the file extension for an output format and compression."""
+    extension = sink_class(output_format).extension
+    if compression == "gzip" and output_format != "parquet":
+        extension += ".gz"
+    return extension
@@ -0,0 +1,52 @@
+"""
+Local model snapshots for runs without network access.
+
+By default every run logs into the Hugging Face Hub and `from_pretrained`
+checks the Hub for newer files, which stalls or fails on hosts without
+network access. `prefetch` downloads what generation needs (configs,
+tokenizer files and safetensors weights) into the Hugging Face cache and
+records which commit the requested revision (`main` by default) resolved
+to. A run with `model.offline` then loads every model through
+`local_snapshot`, which only looks in that cache: no login, no token and
+no network calls, so startup is just reading from disk. Models without a
+pinned revision, such as the draft model and the label verifier, are
+found through the revision they were prefetched at.
+"""
+
+import os
+from typing import Optional, Tuple
+
+# Everything needed to load a model and its tokenizer; weights as safetensors only.
+SNAPSHOT_PATTERNS = ["*.json", "*.safetensors", "*.model", "*.txt", "*.jinja", "*.tiktoken", "tokenizer*"]
+
+def prefetch(model: str, revision: Optional[str] = None, token: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Downloads a model's snapshot into the Hugging Face cache and returns its commit hash and directory.
+
+    The cache also records the commit `revision` (default `main`) points
+    to, so offline lookups without a revision find the snapshot.
+    """
+    from huggingface_hub import HfApi, snapshot_download
+
+    try:
+        info = HfApi(token=token).model_info(model, revision=revision, files_metadata=False)
+    except Exception as e:
+        raise ValueError(f"Could not resolve {model} on the Hugging Face Hub: {e}") from e
+    if not any(sibling.rfilename.endswith(".safetensors") for sibling in info.siblings or []):
+        raise ValueError(f"{model} has no safetensors weights to prefetch.")
+    path = snapshot_download(model, revision=revision, allow_patterns=SNAPSHOT_PATTERNS, token=token)
+    # Snapshot directories are named after their commit, which is what to pin
+    # even if the branch moved since it was resolved above.
+    return os.path.basename(path), path
+
+def local_snapshot(model: str, revision: Optional[str] = None) -> str:
+    """Returns the directory of a prefetched model without contacting the Hub."""
+    if os.path.isdir(model):
+        return model
+    from huggingface_hub import snapshot_download
+
+    try:
+        return snapshot_download(model, revision=revision, local_files_only=True)
+    except Exception as e:
+        at = f" at revision {revision}" if revision else ""
+        raise ValueError(f"{model}{at} is not available offline. Run `synthetic-cli prefetch {model}` on a host with network access first.") from e
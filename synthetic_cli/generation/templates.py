@@ -0,0 +1,124 @@
+"""
+Chat prompts compiled once per run.
+
+Every prompt of a run is the same chat with three slots (label, category
+and type) filled in, yet rendering the chat template and tokenizing the
+whole prompt for every sample repeats work on text that never changes.
+
+`CompiledPrompt` renders the template once with marker strings in the
+slots and splits the result into runs of lines that hold a slot and runs
+that do not. The fixed runs are tokenized once; for a sample only its slot
+lines are tokenized and spliced in between them. Splitting on line
+boundaries tokenizes the same way as the whole prompt for typical
+tokenizers; the first prompt is checked against a full render and
+tokenization, and splicing is turned off for the run if they differ.
+
+Token ids are also kept per unique slot values in an LRU, so a repeated
+(label, category, type) triple costs a dictionary lookup.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from rich.console import Console
+
+console = Console()
+
+Conversation = List[Dict[str, str]]
+
+class SlottedConversation(list):
+    """A conversation built from the run's template, remembering the values filled into its slots."""
+
+    def __init__(self, messages: Conversation, slots: Tuple[str, ...]):
+        super().__init__(messages)
+        self.slots = slots
+
+class CompiledPrompt:
+    """A chat template rendered once, with token ids for its fixed parts."""
+
+    def __init__(self, tokenizer, template: Conversation, markers: Sequence[str], cache_size: int = 1024):
+        self.tokenizer = tokenizer
+        self.markers = tuple(markers)
+        self.cache_size = cache_size
+        self.splicing = True
+        self._verified = False
+        self._cache: "OrderedDict[Tuple[str, ...], List[int]]" = OrderedDict()
+
+        rendered = self._render(template)
+        if not any(marker in rendered for marker in self.markers):
+            raise ValueError("the chat template drops the prompt's slots")
+
+        runs: List[Tuple[bool, str]] = []
+        for line in rendered.splitlines(keepends=True):
+            is_slot = any(marker in line for marker in self.markers)
+            if runs and runs[-1][0] == is_slot:
+                runs[-1] = (is_slot, runs[-1][1] + line)
+            else:
+                runs.append((is_slot, line))
+        # (text, token ids of fixed text or None for slot lines)
+        self._parts: List[Tuple[str, Optional[List[int]]]] = [
+            (text, None if is_slot else self._tokenize(text)) for is_slot, text in runs
+        ]
+
+        # Everything before the first slot line is shared by every prompt.
+        if self._parts[0][1] is not None:
+            self.prefix_text, self.prefix_ids = self._parts.pop(0)
+        else:
+            self.prefix_text, self.prefix_ids = "", []
+
+    def _render(self, messages: Conversation) -> str:
+        return self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+
+    def _tokenize(self, text: str) -> List[int]:
+        return self.tokenizer(text, add_special_tokens=False).input_ids
+
+    def _spliced(self, slots: Tuple[str, ...]) -> List[int]:
+        ids: List[int] = []
+        for text, fixed in self._parts:
+            if fixed is not None:
+                ids.extend(fixed)
+                continue
+            for marker, value in zip(self.markers, slots):
+                text = text.replace(marker, value)
+            ids.extend(self._tokenize(text))
+        return ids
+
+    def _rendered_suffix(self, conversation: Conversation) -> List[int]:
+        """Renders and tokenizes a prompt the slow way, after the shared prefix."""
+        rendered = self._render(conversation)
+        if not rendered.startswith(self.prefix_text):
+            raise ValueError("rendered prompt does not start with the cached prefix")
+        return self._tokenize(rendered[len(self.prefix_text):])
+
+    def suffix_ids(self, conversation: SlottedConversation) -> List[int]:
+        """Returns the token ids of a prompt after the shared prefix."""
+        key = conversation.slots
+        ids = self._cache.get(key)
+        if ids is not None:
+            self._cache.move_to_end(key)
+            return ids
+
+        if self.splicing:
+            ids = self._spliced(key)
+            if not self._verified:
+                self._verified = True
+                rendered = self._rendered_suffix(conversation)
+                if rendered != ids:
+                    console.print("[yellow]Warning: This tokenizer does not split prompts on line boundaries; tokenizing each prompt in full.[/yellow]")
+                    self.splicing = False
+                    ids = rendered
+        else:
+            ids = self._rendered_suffix(conversation)
+
+        self._cache[key] = ids
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return ids
+
+    def token_ids(self, conversation: SlottedConversation) -> List[int]:
+        """Returns the token ids of a whole prompt."""
+        return self.prefix_ids + self.suffix_ids(conversation)
+
+    def matches_full_tokenization(self, conversation: SlottedConversation) -> bool:
+        """Checks that a prompt's ids equal those of tokenizing the whole rendered prompt at once."""
+        return self.token_ids(conversation) == self._tokenize(self._render(conversation))
@@ -0,0 +1,157 @@
+"""
+Checks that generated text actually matches the label it was generated for.
+
+Models often write text that fits another label than the one requested.
+`LabelVerifier` scores every generated row against the run's labels with a
+small local model, so the generator can regenerate or drop mismatches
+before they are written:
+
+* `zero-shot` runs a natural-language-inference model through the
+  zero-shot-classification pipeline, with the run's labels as candidates;
+* `classifier` runs a text-classification model whose own labels are
+  matched to the run's labels by name (case-insensitively) or through
+  `label_map`.
+
+A row matches when its requested label is the top prediction and scores at
+least `min_confidence`. That score is kept as the row's confidence.
+
+Rows are scored in batches of `batch_size` on a dedicated worker thread,
+so verifying one batch overlaps with generating the next. The model is
+loaded on that thread the first time it is needed.
+
+`VerifyStats` counts checked rows, mismatches per (requested, predicted)
+label pair, regenerations and drops for the end-of-run report.
+"""
+
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from rich.console import Console
+
+from synthetic_cli.config.models import VerifyConfig
+from synthetic_cli.generation.snapshots import local_snapshot
+
+console = Console()
+
+VERIFY_METHODS = ("zero-shot", "classifier")
+MISMATCH_ACTIONS = ("regenerate", "drop")
+
+# (predicted label, confidence in the requested label)
+Score = Tuple[str, float]
+
+class LabelVerifier:
+    """Scores generated texts against the labels they were generated for."""
+
+    def __init__(self, verify_config: VerifyConfig, labels: List[str], hf_token: Optional[str] = None, offline: bool = False):
+        if verify_config.method not in VERIFY_METHODS:
+            raise ValueError(f"Unknown verify method '{verify_config.method}'. Choose from: {', '.join(VERIFY_METHODS)}.")
+        if verify_config.on_mismatch not in MISMATCH_ACTIONS:
+            raise ValueError(f"Unknown verify.on_mismatch '{verify_config.on_mismatch}'. Choose from: {', '.join(MISMATCH_ACTIONS)}.")
+        unknown = set(verify_config.label_map.values()) - set(labels)
+        if unknown:
+            raise ValueError(f"Unknown label(s) in verify.label_map: {', '.join(sorted(unknown))}")
+        self.config = verify_config
+        self.labels = list(labels)
+        self.hf_token = hf_token
+        self.offline = offline
+        self.pipeline = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def load(self):
+        """Loads the verification model."""
+        from transformers import pipeline
+
+        console.print(f"[bold blue]Initializing label verifier: {self.config.model}...[/bold blue]")
+        task = "zero-shot-classification" if self.config.method == "zero-shot" else "text-classification"
+        if self.offline:
+            self.pipeline = pipeline(task, model=local_snapshot(self.config.model))
+        else:
+            self.pipeline = pipeline(task, model=self.config.model, token=self.hf_token)
+
+    def _run_label(self, name: str) -> Optional[str]:
+        """Maps a classifier's label name to one of the run's labels."""
+        if name in self.config.label_map:
+            return self.config.label_map[name]
+        for label in self.labels:
+            if label.lower() == name.lower():
+                return label
+        return None
+
+    def score(self, texts: List[str], labels: List[str]) -> List[Score]:
+        """Returns the predicted label of each text and its confidence in the label it was generated for."""
+        if self.pipeline is None:
+            self.load()
+        if not texts:
+            return []
+        batch_size = self.config.batch_size
+        scores: List[Score] = []
+        if self.config.method == "zero-shot":
+            results = self.pipeline(
+                texts,
+                candidate_labels=self.labels,
+                hypothesis_template=self.config.hypothesis_template,
+                batch_size=batch_size,
+            )
+            if isinstance(results, dict):
+                results = [results]
+            for result, label in zip(results, labels):
+                by_label = dict(zip(result["labels"], result["scores"]))
+                scores.append((result["labels"][0], by_label.get(label, 0.0)))
+            return scores
+
+        for result, label in zip(self.pipeline(texts, top_k=None, batch_size=batch_size), labels):
+            by_label = {}
+            for entry in result:
+                run_label = self._run_label(entry["label"])
+                if run_label is not None:
+                    by_label[run_label] = by_label.get(run_label, 0.0) + entry["score"]
+            predicted = max(by_label, key=by_label.get) if by_label else ""
+            scores.append((predicted, by_label.get(label, 0.0)))
+        return scores
+
+    async def ascore(self, texts: List[str], labels: List[str]) -> List[Score]:
+        """Scores texts on the verifier's own worker thread."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="synthetic-cli-verifier")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.score, texts, labels)
+
+    def matches(self, label: str, score: Score) -> bool:
+        predicted, confidence = score
+        return predicted == label and confidence >= self.config.min_confidence
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.pipeline = None
+
+class VerifyStats:
+    """Counts of checked, mismatched, regenerated and dropped rows per label."""
+
+    def __init__(self):
+        self.checked: Counter = Counter()
+        self.mismatches: Counter = Counter()
+        self.regenerated: Counter = Counter()
+        self.dropped: Counter = Counter()
+
+    def record(self, label: str, predicted: str, matched: bool):
+        self.checked[label] += 1
+        if not matched:
+            self.mismatches[(label, predicted)] += 1
+
+    def report(self, top: int = 5):
+        """Prints the overall mismatch rate and the most frequent confusions."""
+        checked = sum(self.checked.values())
+        if not checked:
+            return
+        mismatches = sum(self.mismatches.values())
+        console.print(
+            f"[blue]Label verification: {mismatches} of {checked} generated rows did not match their label "
+            f"({mismatches / checked:.1%}). {sum(self.regenerated.values())} regenerated, {sum(self.dropped.values())} dropped.[/blue]"
+        )
+        for (label, predicted), count in self.mismatches.most_common(top):
+            reason = "below min_confidence" if predicted == label else f"read as {predicted or 'no known label'}"
+            console.print(f"[blue]  {label} {reason}: {count} rows[/blue]")
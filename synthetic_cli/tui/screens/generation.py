@@ -2,20 +2,26 @@
 
 from textual.app import ComposeResult
 from textual.screen import Screen
-from textual.widgets import Button, Header, Footer, Label, Static, LoadingIndicator
+from textual.widgets import Button, Header, Footer, Label, Static, ProgressBar
 from textual.containers import Grid
 from textual.worker import Worker, WorkerState
 
-from synthetic_cli.commands.generate import generate_data
+def _format_seconds(seconds) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
 
 class GenerationScreen(Screen):
-    """Shows a loading indicator while data is being generated."""
+    """Shows live progress and throughput while data is being generated."""
 
     def compose(self) -> ComposeResult:
         yield Header()
         yield Grid(
-            LoadingIndicator(),
             Static("Starting data generation...", id="status"),
+            ProgressBar(total=None, show_eta=False, id="progress"),
+            Static("", id="stats"),
             id="dialog",
         )
         yield Footer()
@@ -40,7 +46,35 @@ class GenerationScreen(Screen):
 
     def generation_worker(self) -> None:
         """The actual worker function that calls the data generator."""
-        generate_data(self.app.config)
+        # Imported here so the heavy model dependencies load only once generation starts.
+        from synthetic_cli.commands.generate import generate_data
+
+        generate_data(self.app.config, on_progress=lambda event: self.app.call_from_thread(self.show_progress, event))
+
+    def show_progress(self, event) -> None:
+        """Renders a progress event from the generator."""
+        if not self.is_mounted or not self.query("#progress"):
+            return
+        self.query_one("#progress", ProgressBar).update(total=event.samples_total, progress=event.samples_done)
+
+        if event.kind == "batch_started":
+            status = f"Generating batch {event.batch + 1}/{event.num_batches}..."
+        elif event.kind == "batch_written":
+            status = f"Batch {event.batch + 1}/{event.num_batches} saved to {event.output_path}"
+        elif event.kind == "done":
+            status = "Finishing up..."
+        else:
+            status = f"Generating into {event.output_path}"
+        self.query_one("#status", Static).update(status)
+
+        failures = sum(event.parse_failures.values())
+        self.query_one("#stats", Static).update(
+            f"Samples: {event.samples_done}/{event.samples_total}   Dropped: {event.rows_dropped}\n"
+            f"Tokens: {event.tokens} ({event.tokens_per_second:.1f}/s)\n"
+            f"Elapsed: {_format_seconds(event.elapsed_seconds)}   ETA: {_format_seconds(event.eta_seconds)}\n"
+            f"Parse failures: {failures}"
+            + (f" ({', '.join(f'{kind}: {count}' for kind, count in sorted(event.parse_failures.items()))})" if failures else "")
+        )
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "exit":
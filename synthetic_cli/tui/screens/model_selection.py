@@ -1,12 +1,37 @@
 """Screen for selecting the generation model."""
 
+from typing import List
+
 from textual.app import ComposeResult
 from textual.screen import Screen
-from textual.widgets import Button, Header, Footer, Label, RadioSet, RadioButton
-from textual.containers import Grid
+from textual.widgets import Button, Header, Footer, Label, RadioSet, RadioButton, Checkbox, Input, Static
+from textual.containers import Grid, Horizontal
 
 from .token import TokenScreen
 
+# Escapes accepted in the stop strings field; anything else after a backslash is kept as typed.
+STOP_ESCAPES = {"n": "\n", "t": "\t", "\\": "\\", ",": ","}
+
+def parse_stop_strings(value: str) -> List[str]:
+    """
+    Splits the stop strings field on unescaped commas and resolves its escapes.
+
+    Whitespace is kept as typed, since stop strings may start or end with it.
+    """
+    stops, current = [], []
+    characters = iter(value)
+    for character in characters:
+        if character == "\\":
+            following = next(characters, "")
+            current.append(STOP_ESCAPES.get(following, character + following))
+        elif character == ",":
+            stops.append("".join(current))
+            current = []
+        else:
+            current.append(character)
+    stops.append("".join(current))
+    return [stop for stop in stops if stop]
+
 class ModelSelectionScreen(Screen):
     """Screen for selecting the generation model."""
 
@@ -20,18 +45,53 @@ class ModelSelectionScreen(Screen):
                 "HuggingFaceTB/SmolLM2-1.7B-Instruct",
                 id="model_select",
             ),
+            Horizontal(
+                Static("Draft Model: ", classes="label"),
+                Input(placeholder="optional, e.g. meta-llama/Llama-3.2-1B-Instruct", id="draft_model", classes="input"),
+            ),
+            Checkbox("Structured (JSON) output", value=False, id="json_output"),
+            Horizontal(
+                Static("Stop Strings: ", classes="label"),
+                Input(placeholder="comma-separated; \\n, \\t, \\\\ and \\, escapes, e.g. \\n\\nLABEL:", id="stop_strings", classes="input"),
+            ),
+            Checkbox("Adaptive max new tokens", value=False, id="adaptive_max_new_tokens"),
+            Static("Precision:"),
+            RadioSet("default", "bfloat16", "float16", "float32", id="torch_dtype"),
+            Checkbox("Dynamic int8 quantization (CPU, float32 only)", value=False, id="quantization"),
+            Checkbox("Low CPU memory loading", value=False, id="low_cpu_mem_usage"),
+            Checkbox("Memory-map safetensors weights", value=False, id="use_safetensors"),
+            Checkbox("Offline (prefetched snapshots only)", value=False, id="offline"),
+            Horizontal(
+                Static("Torch Threads: ", classes="label"),
+                Input(placeholder="all cores", id="num_threads", classes="input"),
+            ),
             Button("Next", variant="primary", id="next"),
             id="dialog",
         )
         yield Footer()
 
     def on_mount(self) -> None:
-        # Set default value
-        self.query_one(RadioSet).query(RadioButton).first().value = True
+        # Set default values
+        for radio_set in self.query(RadioSet):
+            radio_set.query(RadioButton).first().value = True
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "next":
-            model_select = self.query_one(RadioSet)
+            model_select = self.query_one("#model_select", RadioSet)
             if model_select.pressed_button:
                 self.app.config.model_config.model = str(model_select.pressed_button.label)
+                self.app.config.model_config.draft_model = self.query_one("#draft_model", Input).value.strip() or None
+                self.app.config.model_config.output_mode = "json" if self.query_one("#json_output", Checkbox).value else "text"
+                # Escapes let newlines and commas be typed, e.g. "\n\nLABEL:".
+                self.app.config.model_config.stop_strings = parse_stop_strings(self.query_one("#stop_strings", Input).value)
+                self.app.config.model_config.adaptive_max_new_tokens = self.query_one("#adaptive_max_new_tokens", Checkbox).value
+                torch_dtype = self.query_one("#torch_dtype", RadioSet).pressed_button
+                dtype_label = str(torch_dtype.label) if torch_dtype else "default"
+                self.app.config.model_config.torch_dtype = None if dtype_label == "default" else dtype_label
+                self.app.config.model_config.quantization = "dynamic-int8" if self.query_one("#quantization", Checkbox).value else None
+                self.app.config.model_config.low_cpu_mem_usage = self.query_one("#low_cpu_mem_usage", Checkbox).value
+                self.app.config.model_config.use_safetensors = self.query_one("#use_safetensors", Checkbox).value
+                self.app.config.model_config.offline = self.query_one("#offline", Checkbox).value
+                num_threads = self.query_one("#num_threads", Input).value.strip()
+                self.app.config.model_config.num_threads = int(num_threads) if num_threads else None
                 self.app.push_screen(TokenScreen())
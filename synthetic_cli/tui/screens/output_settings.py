@@ -2,7 +2,7 @@
 
 from textual.app import ComposeResult
 from textual.screen import Screen
-from textual.widgets import Button, Header, Footer, Label, Input, Checkbox, Static
+from textual.widgets import Button, Header, Footer, Label, Input, Checkbox, Static, RadioSet, RadioButton
 from textual.containers import Grid, Horizontal
 
 from .summary import SummaryScreen
@@ -16,17 +16,45 @@ class OutputSettingsScreen(Screen):
             Label("Step 8: Output Settings"),
             Horizontal(Static("Sample Size: ", classes="label"), Input(value="100", id="sample_size", classes="input"),),
             Horizontal(Static("Batch Size: ", classes="label"), Input(value="20", id="batch_size", classes="input"),),
+            Horizontal(Static("Inference Batch Size: ", classes="label"), Input(value="8", id="inference_batch_size", classes="input"),),
             Horizontal(Static("Output Directory: ", classes="label"), Input(value="./generated_data", id="output_dir", classes="input"),),
             Checkbox("Save Reasoning", value=True, id="save_reasoning"),
+            Static("Output Format:"),
+            RadioSet("csv", "jsonl", "parquet", id="output_format"),
+            Checkbox("Compress Output", value=False, id="compress"),
+            Checkbox(
+                f"Regenerate Near-Duplicate Rows (Dropped After {self.app.config.dedup_config.retries} Retries)",
+                value=False,
+                id="dedup",
+            ),
+            Horizontal(
+                Static("Label Verifier: ", classes="label"),
+                Input(placeholder="optional zero-shot model, e.g. facebook/bart-large-mnli", id="verify_model", classes="input"),
+            ),
             Button("Next", variant="primary", id="next"),
             id="dialog",
         )
         yield Footer()
 
+    def on_mount(self) -> None:
+        # Set default value
+        self.query_one(RadioSet).query(RadioButton).first().value = True
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "next":
             self.app.config.output_config.sample_size = int(self.query_one("#sample_size", Input).value)
             self.app.config.output_config.batch_size = int(self.query_one("#batch_size", Input).value)
+            self.app.config.model_config.inference_batch_size = int(self.query_one("#inference_batch_size", Input).value)
             self.app.config.output_config.output_dir = self.query_one("#output_dir", Input).value
             self.app.config.output_config.save_reasoning = self.query_one("#save_reasoning", Checkbox).value
+            output_format = self.query_one("#output_format", RadioSet)
+            if output_format.pressed_button:
+                self.app.config.output_config.output_format = str(output_format.pressed_button.label)
+            if self.query_one("#compress", Checkbox).value:
+                # gzip for the text formats; Parquet compresses its own pages.
+                self.app.config.output_config.compression = "zstd" if self.app.config.output_config.output_format == "parquet" else "gzip"
+            else:
+                self.app.config.output_config.compression = None
+            self.app.config.dedup_config.mode = "near" if self.query_one("#dedup", Checkbox).value else None
+            self.app.config.verify_config.model = self.query_one("#verify_model", Input).value.strip() or None
             self.app.push_screen(SummaryScreen())
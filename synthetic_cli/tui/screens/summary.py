@@ -41,12 +41,23 @@ class SummaryScreen(Screen):
             f"[bold]Categories & Types:[/bold]\n{categories_str}\n"
             f"[bold]Prompt Examples:[/bold]\n{use_case.prompt_examples}\n\n"
             f"[bold]Model:[/bold] {model.model}\n"
+            f"[bold]Draft Model:[/bold] {model.draft_model or 'None'}\n"
+            f"[bold]Offline:[/bold] {model.offline}\n"
             f"[bold]Max New Tokens:[/bold] {model.max_new_tokens}\n"
+            f"[bold]Inference Batch Size:[/bold] {model.inference_batch_size}\n"
+            f"[bold]Output Mode:[/bold] {model.output_mode}\n"
+            f"[bold]Stop Strings:[/bold] {', '.join(repr(stop) for stop in model.stop_strings) or 'None'}\n"
+            f"[bold]Adaptive Max New Tokens:[/bold] {model.adaptive_max_new_tokens}\n"
+            f"[bold]Precision:[/bold] {model.torch_dtype or 'default'}{' + dynamic int8' if model.quantization else ''}\n"
+            f"[bold]Torch Threads:[/bold] {model.num_threads or 'all cores'}\n"
             f"[bold]HF Token:[/bold] {'********' if model.hf_token else 'Not Set'}\n\n"
             f"[bold]Sample Size:[/bold] {output.sample_size}\n"
             f"[bold]Batch Size:[/bold] {output.batch_size}\n"
             f"[bold]Output Directory:[/bold] {output.output_dir}\n"
-            f"[bold]Save Reasoning:[/bold] {output.save_reasoning}"
+            f"[bold]Output Format:[/bold] {output.output_format}{f' ({output.compression})' if output.compression else ''}\n"
+            f"[bold]Save Reasoning:[/bold] {output.save_reasoning}\n"
+            f"[bold]Deduplication:[/bold] {config.dedup_config.mode or 'Off'}\n"
+            f"[bold]Label Verifier:[/bold] {config.verify_config.model or 'Off'}"
         )
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
@@ -0,0 +1,73 @@
+"""End-to-end test of a work queue processed by several worker processes."""
+
+import os
+import subprocess
+import sys
+
+import yaml
+
+from synthetic_cli.commands.generate import DataGenerator
+from synthetic_cli.config.loader import load_config
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UNIT_BATCHES = 2
+
+def _write_config(tmp_path) -> str:
+    config = {
+        "use_case": {
+            "labels": ["positive", "negative", "neutral"],
+            "label_descriptions": "Sentiment of a support message.",
+            "categories_types": {"support": ["complaint", "inquiry"], "sales": ["lead"]},
+        },
+        "model": {"model": "stub-model", "backend": "stub"},
+        "output": {
+            "sample_size": 60,
+            "batch_size": 5,
+            "output_dir": str(tmp_path / "out"),
+            "output_format": "jsonl",
+            "seed": 5,
+        },
+        # The stub repeats itself for identical prompts, so most rows are duplicates.
+        "dedup": {"mode": "exact", "retries": 1},
+        "cache": {"enabled": False},
+    }
+    path = tmp_path / "run.yaml"
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    return str(path)
+
+def _cli(*args: str, cwd) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.Popen(
+        [sys.executable, "-m", "synthetic_cli.cli", *args],
+        cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+
+def _check(process: subprocess.Popen, timeout: float = 300):
+    output, _ = process.communicate(timeout=timeout)
+    assert process.returncode == 0, output
+
+def test_two_workers_match_per_unit_runs(tmp_path):
+    config_path = _write_config(tmp_path)
+    queue_dir = tmp_path / "queue"
+    merged_path = tmp_path / "merged.jsonl"
+
+    _check(_cli("generate", "--config", config_path, "--queue", str(queue_dir), "--unit-batches", str(UNIT_BATCHES), cwd=tmp_path))
+    workers = [_cli("worker", str(queue_dir), "--poll", "0.1", cwd=tmp_path) for _ in range(2)]
+    for worker in workers:
+        _check(worker)
+    _check(_cli("merge", str(queue_dir), "--output", str(merged_path), cwd=tmp_path))
+
+    # Each unit must come out as if generated on its own: a worker's
+    # duplicate index, token budget and statistics never carry over.
+    config = load_config(config_path)
+    generator = DataGenerator(config)
+    expected = []
+    for start in range(0, generator.num_batches(), UNIT_BATCHES):
+        unit_path = tmp_path / f"unit-{start}.jsonl"
+        DataGenerator(config).run(output_path=str(unit_path), batch_range=range(start, start + UNIT_BATCHES))
+        expected.extend(unit_path.read_text(encoding="utf-8").splitlines())
+
+    assert expected
+    assert merged_path.read_text(encoding="utf-8").splitlines() == expected
+    assert not queue_dir.exists()